@@ -0,0 +1,105 @@
+import asyncio
+import asyncpg
+
+from db_connection import (DB_CONFIG, DB_POOL_MAX, DB_POOL_MIN, HAZARD_FEATURES_SQL, POI_FEATURES_SQL,
+                           build_feature_dicts, split_feature_row)
+from instrumentation import inc, status, timer
+from predict_risk import score_features
+from risk_service import get_service
+from train_model import DEFAULT_MODEL_PATH
+
+_pool = None
+_pool_lock = asyncio.Lock()
+
+async def get_async_pool():
+    """Return the process-wide asyncpg pool, creating it on first use.
+
+    The pool belongs to the event loop that created it; call
+    close_async_pool() before switching loops.
+    """
+    global _pool
+    if _pool is None:
+        async with _pool_lock:
+            if _pool is None:
+                _pool = await asyncpg.create_pool(min_size=DB_POOL_MIN, max_size=DB_POOL_MAX, **DB_CONFIG)
+    return _pool
+
+async def close_async_pool():
+    global _pool
+    async with _pool_lock:
+        if _pool is not None:
+            await _pool.close()
+            _pool = None
+
+async def _fetchrow(pool, stage, query, lon, lat):
+    # asyncpg prepares and caches each statement per connection, so repeat calls skip parsing and planning
+    with timer(stage):
+        async with pool.acquire() as conn:
+            return await conn.fetchrow(query, lon, lat)
+
+async def get_ml_features(lat, lon):
+    """Async get_ml_features: the hazard and POI queries run concurrently on two pooled connections"""
+    try:
+        pool = await get_async_pool()
+        status(f"🔍 Extracting features for location: {lat}, {lon}")
+        hazard_row, poi_row = await asyncio.gather(
+            _fetchrow(pool, 'query_hazards', HAZARD_FEATURES_SQL, float(lon), float(lat)),
+            _fetchrow(pool, 'query_pois', POI_FEATURES_SQL, float(lon), float(lat))
+        )
+
+        with timer('feature_dicts'):
+            hazard_features, poi_features = build_feature_dicts(
+                lat, lon, *split_feature_row(tuple(hazard_row) + tuple(poi_row))
+            )
+        status("✅ Feature extraction successful!")
+        return hazard_features, poi_features
+
+    except Exception as e:
+        inc('feature_errors_total', path='async')
+        print(f"❌ Error: {e}")
+        return None, None
+
+def _score(model_path, lat, lon, hazard_features, poi_features, explain):
+    predictor = get_service(model_path).get_predictor()
+    return score_features(predictor, lat, lon, hazard_features, poi_features, explain=explain)
+
+async def predict_tourist_risk(lat, lon, model_path=DEFAULT_MODEL_PATH, explain=None, executor=None):
+    """Async predict_tourist_risk returning the same result dict.
+
+    Model loading, inference and SHAP run in `executor` (the loop's default
+    thread pool when None), so the event loop keeps serving other requests.
+    """
+    hazard_features, poi_features = await get_ml_features(lat, lon)
+    if hazard_features is None or poi_features is None:
+        print("❌ Failed to extract features from database")
+        return None
+
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            executor, _score, model_path, lat, lon, hazard_features, poi_features, explain
+        )
+    except Exception as e:
+        print(f"❌ Prediction error: {e}")
+        return None
+
+if __name__ == "__main__":
+    import time
+    import numpy as np
+
+    async def main(n_requests=100):
+        rng = np.random.default_rng(42)
+        lats = 26.1445 + rng.normal(0, 0.05, n_requests)
+        lons = 91.7362 + rng.normal(0, 0.05, n_requests)
+
+        started = time.perf_counter()
+        results = await asyncio.gather(*(predict_tourist_risk(lat, lon) for lat, lon in zip(lats, lons)))
+        elapsed = time.perf_counter() - started
+
+        succeeded = [result for result in results if result is not None]
+        print(f"⚡ {len(succeeded)}/{n_requests} concurrent predictions in {elapsed:.2f}s")
+        if succeeded:
+            print(f"🎯 First result: {succeeded[0]['prediction']}")
+        await close_async_pool()
+
+    asyncio.run(main())
@@ -0,0 +1,278 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import numpy as np
+import shapely
+
+from db_connection import (ASSAM_BBOX, create_feature_indexes, get_db_connection, get_ml_features,
+                           get_ml_features_batch)
+from features import build_feature_matrix, build_feature_vector
+from instrumentation import get_metrics
+from predict_risk import predict_tourist_risk, score_features
+from spatial_index import SpatialFeatureEngine, to_web_mercator
+from train_model import DEFAULT_MODEL_PATH, ExplainableTouristRiskPredictor
+
+BENCHMARK_FORMAT_VERSION = 1
+
+# Synthetic towns: hazards and POIs cluster around them, like the real OSM extracts
+CLUSTER_SPREAD_DEG = 0.05
+
+def make_fixtures(n_hazards=2000, n_pois=3000, n_clusters=20, seed=42):
+    """Synthetic hazard_zone_ml and pois records (EPSG:3857 geometries) clustered in the Assam bbox"""
+    rng = np.random.default_rng(seed)
+    min_lat, max_lat, min_lon, max_lon = ASSAM_BBOX
+    centres = np.column_stack([rng.uniform(min_lat, max_lat, n_clusters), rng.uniform(min_lon, max_lon, n_clusters)])
+
+    def clustered(n):
+        picked = centres[rng.integers(0, n_clusters, n)]
+        return to_web_mercator(picked[:, 0] + rng.normal(0, CLUSTER_SPREAD_DEG, n),
+                               picked[:, 1] + rng.normal(0, CLUSTER_SPREAD_DEG, n))
+
+    x, y = clustered(n_hazards)
+    polygons = shapely.buffer(shapely.points(x, y), rng.uniform(50, 500, n_hazards), quad_segs=4)
+    kinds = rng.choice(['industrial', 'military', 'water', 'reservoir', 'other'], n_hazards)
+    hazard_zones = [
+        {
+            'geometry': polygon,
+            'danger_weight': float(weight),
+            'zone_type': 'industrial' if kind == 'industrial' else None,
+            'military': 'base' if kind == 'military' else None,
+            'natural': 'water' if kind == 'water' else None,
+            'landuse': 'reservoir' if kind == 'reservoir' else None
+        }
+        for polygon, weight, kind in zip(polygons, rng.uniform(0.1, 1.0, n_hazards), kinds)
+    ]
+
+    x, y = clustered(n_pois)
+    amenities = rng.choice(['hospital', 'police', 'pharmacy', 'restaurant'], n_pois, p=[0.15, 0.15, 0.2, 0.5])
+    pois = [
+        {'geometry': point, 'amenity': str(amenity), 'safety_weight': float(weight)}
+        for point, amenity, weight in zip(shapely.points(x, y), amenities, rng.uniform(0.1, 1.0, n_pois))
+    ]
+    return hazard_zones, pois, centres
+
+def sample_points(centres, n, seed=7):
+    """Query coordinates near the fixture clusters, with a tenth spread over the whole bbox"""
+    rng = np.random.default_rng(seed)
+    min_lat, max_lat, min_lon, max_lon = ASSAM_BBOX
+    picked = centres[rng.integers(0, len(centres), n)]
+    lats = picked[:, 0] + rng.normal(0, CLUSTER_SPREAD_DEG, n)
+    lons = picked[:, 1] + rng.normal(0, CLUSTER_SPREAD_DEG, n)
+    spread = rng.random(n) < 0.1
+    lats[spread] = rng.uniform(min_lat, max_lat, spread.sum())
+    lons[spread] = rng.uniform(min_lon, max_lon, spread.sum())
+    return lats, lons
+
+def load_fixtures_into_db(hazard_zones, pois):
+    """Replace hazard_zone_ml and pois with the fixtures; only point this at a throwaway database"""
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            CREATE EXTENSION IF NOT EXISTS postgis;
+            DROP TABLE IF EXISTS hazard_zone_ml;
+            DROP TABLE IF EXISTS pois;
+            CREATE TABLE hazard_zone_ml (
+                id serial PRIMARY KEY, geometry geometry(Geometry, 3857), danger_weight float8,
+                zone_type text, military text, "natural" text, landuse text
+            );
+            CREATE TABLE pois (
+                id serial PRIMARY KEY, geometry geometry(Geometry, 3857), amenity text, safety_weight float8
+            );
+        """)
+        cursor.executemany("""
+            INSERT INTO hazard_zone_ml (geometry, danger_weight, zone_type, military, "natural", landuse)
+            VALUES (ST_SetSRID(ST_GeomFromWKB(%s), 3857), %s, %s, %s, %s, %s)
+        """, [(shapely.to_wkb(h['geometry']), h['danger_weight'], h['zone_type'], h['military'],
+               h['natural'], h['landuse']) for h in hazard_zones])
+        cursor.executemany("""
+            INSERT INTO pois (geometry, amenity, safety_weight)
+            VALUES (ST_SetSRID(ST_GeomFromWKB(%s), 3857), %s, %s)
+        """, [(shapely.to_wkb(p['geometry']), p['amenity'], p['safety_weight']) for p in pois])
+        conn.commit()
+    create_feature_indexes()
+    print(f"🗄️  Loaded {len(hazard_zones)} hazard zones and {len(pois)} POIs into PostGIS")
+
+def summarize(durations, rows_per_call=1):
+    """Latency percentiles (ms) and throughput (rows/s) for per-call durations in seconds"""
+    durations = np.asarray(durations, dtype=float)
+    p50, p95, p99 = np.percentile(durations, [50, 95, 99]) * 1000
+    return {
+        'calls': len(durations),
+        'rows_per_call': rows_per_call,
+        'p50_ms': float(p50),
+        'p95_ms': float(p95),
+        'p99_ms': float(p99),
+        'mean_ms': float(durations.mean() * 1000),
+        'throughput_rows_s': float(rows_per_call * len(durations) / durations.sum())
+    }
+
+@contextlib.contextmanager
+def quiet():
+    """Swallow the status prints of the functions under test so they do not skew timings"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        yield
+
+def measure(fn, inputs, rows_per_call=1, warmup=3, setup=None):
+    """Time fn(*args) once per entry of inputs; setup() runs untimed before every call"""
+    inputs = list(inputs)
+    durations = []
+    with quiet():
+        for args in inputs[:warmup]:
+            if setup is not None:
+                setup()
+            fn(*args)
+
+        for args in inputs:
+            if setup is not None:
+                setup()
+            started = time.perf_counter()
+            fn(*args)
+            durations.append(time.perf_counter() - started)
+    return summarize(durations, rows_per_call)
+
+def run_benchmarks(backend='memory', model_path=DEFAULT_MODEL_PATH, n_points=200, batch_size=500,
+                   n_batches=10, n_loads=3, n_hazards=2000, n_pois=3000, load_fixtures=False):
+    """Run every benchmark case and return the machine-readable report"""
+    hazard_zones, pois, centres = make_fixtures(n_hazards=n_hazards, n_pois=n_pois)
+    lats, lons = sample_points(centres, n_points)
+    points = list(zip(lats, lons))
+    batch_lats, batch_lons = sample_points(centres, batch_size * n_batches, seed=11)
+    batches = [(batch_lats[i:i + batch_size], batch_lons[i:i + batch_size])
+               for i in range(0, len(batch_lats), batch_size)]
+
+    if backend == 'postgis':
+        if load_fixtures:
+            load_fixtures_into_db(hazard_zones, pois)
+        feature_source, batch_source = get_ml_features, get_ml_features_batch
+    else:
+        with quiet():
+            engine = SpatialFeatureEngine.from_records(hazard_zones, pois)
+        feature_source, batch_source = engine.get_ml_features, engine.get_ml_features_batch
+
+    results = {}
+    print(f"⏱️  Benchmarking the {backend} backend ({n_points} points, {n_batches} batches of {batch_size})")
+
+    def record(name, summary):
+        results[name] = summary
+        print(f"  {name:<28} p50 {summary['p50_ms']:9.3f}ms  p95 {summary['p95_ms']:9.3f}ms  "
+              f"p99 {summary['p99_ms']:9.3f}ms  {summary['throughput_rows_s']:12.1f} rows/s")
+
+    record('features_single', measure(feature_source, points))
+    record('features_batch', measure(batch_source, batches, rows_per_call=batch_size, warmup=1))
+
+    def load():
+        ExplainableTouristRiskPredictor().load_model(model_path)
+    record('model_load', measure(load, [()] * n_loads, warmup=1))
+
+    with quiet():
+        predictor = ExplainableTouristRiskPredictor()
+        predictor.load_model(model_path)
+        predictor.compile()
+        single_features = [(build_feature_vector(*feature_source(lat, lon)),) for lat, lon in points]
+        batch_features = [(build_feature_matrix(batch_source(*batch)),) for batch in batches]
+
+    record('scale_single', measure(predictor.scaler.transform, single_features))
+    record('predict_single', measure(predictor.predict_proba_features, single_features))
+    record('predict_batch', measure(predictor.predict_proba_features, batch_features,
+                                    rows_per_call=batch_size, warmup=1))
+
+    # Clear the explanation cache so every call pays for a SHAP evaluation
+    clear_cache = predictor._explanation_cache.clear
+    record('shap_single', measure(predictor.explain_batch, single_features, setup=clear_cache))
+    record('shap_batch', measure(predictor.explain_batch, batch_features[:3], rows_per_call=batch_size,
+                                 warmup=0, setup=clear_cache))
+
+    def end_to_end(lat, lon, explain):
+        score_features(predictor, lat, lon, *feature_source(lat, lon), explain=explain)
+    record('end_to_end', measure(end_to_end, [(lat, lon, False) for lat, lon in points]))
+    record('end_to_end_explained', measure(end_to_end, [(lat, lon, True) for lat, lon in points],
+                                           setup=clear_cache))
+    if backend == 'postgis':
+        record('predict_tourist_risk', measure(
+            lambda lat, lon: predict_tourist_risk(lat, lon, model_path=model_path), points
+        ))
+
+    return {
+        'format_version': BENCHMARK_FORMAT_VERSION,
+        'meta': {
+            'backend': backend,
+            'commit': _git_commit(),
+            'created_at': time.time(),
+            'python': platform.python_version(),
+            'machine': platform.machine(),
+            'cpus': os.cpu_count(),
+            'model_path': model_path,
+            'n_hazards': n_hazards,
+            'n_pois': n_pois,
+            'n_points': n_points,
+            'batch_size': batch_size
+        },
+        'results': results,
+        # Per-stage histograms from the instrumentation layer, accumulated over the whole run
+        'stages': get_metrics().snapshot()
+    }
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare_reports(baseline, current, threshold=0.20):
+    """Print p50/throughput changes per case; returns the cases whose p50 regressed by more than threshold"""
+    regressions = []
+    print(f"\n📊 {baseline['meta'].get('commit')} -> {current['meta'].get('commit')}")
+    for name, result in current['results'].items():
+        before = baseline['results'].get(name)
+        if before is None:
+            print(f"  {name:<28} (new)")
+            continue
+        change = result['p50_ms'] / before['p50_ms'] - 1
+        speedup = result['throughput_rows_s'] / before['throughput_rows_s']
+        icon = "❌" if change > threshold else "✅" if change < -threshold else "  "
+        print(f"{icon}{name:<28} p50 {before['p50_ms']:9.3f} -> {result['p50_ms']:9.3f}ms "
+              f"({change:+7.1%})  throughput x{speedup:.2f}")
+        if change > threshold:
+            regressions.append(name)
+    return regressions
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark feature extraction, model inference and SHAP")
+    parser.add_argument('--backend', choices=['memory', 'postgis'], default='memory',
+                        help="In-process spatial index over the fixtures, or the database from DB_* env vars")
+    parser.add_argument('--load-fixtures', action='store_true',
+                        help="Replace hazard_zone_ml and pois with the fixtures (throwaway databases only)")
+    parser.add_argument('--model', default=DEFAULT_MODEL_PATH)
+    parser.add_argument('--points', type=int, default=200)
+    parser.add_argument('--batch-size', type=int, default=500)
+    parser.add_argument('--batches', type=int, default=10)
+    parser.add_argument('--hazards', type=int, default=2000)
+    parser.add_argument('--pois', type=int, default=3000)
+    parser.add_argument('--output', default=None, help="Write the JSON report here")
+    parser.add_argument('--compare', default=None, metavar='BASELINE', help="JSON report to diff against")
+    parser.add_argument('--threshold', type=float, default=0.20, help="p50 slowdown that counts as a regression")
+    args = parser.parse_args()
+
+    report = run_benchmarks(
+        backend=args.backend, model_path=args.model, n_points=args.points, batch_size=args.batch_size,
+        n_batches=args.batches, n_hazards=args.hazards, n_pois=args.pois, load_fixtures=args.load_fixtures
+    )
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"💾 Benchmark report saved to: {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare_reports(baseline, report, threshold=args.threshold)
+        if regressions:
+            print(f"❌ Regressions: {', '.join(regressions)}")
+            sys.exit(1)
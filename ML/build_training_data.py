@@ -0,0 +1,161 @@
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+import pandas as pd
+from psycopg2 import sql
+
+from db_connection import DB_POOL_MAX, get_db_connection, get_ml_features_batch
+from features import FEATURE_NAMES, build_feature_matrix
+
+LABEL_COLUMNS = ['risk_score', 'risk_label', 'data_source', 'created_at', 'updated_at']
+OUTPUT_COLUMNS = ['id', 'lat', 'lon'] + FEATURE_NAMES + LABEL_COLUMNS
+
+def _state_path(output_path):
+    directory, name = os.path.split(output_path)
+    return os.path.join(directory, f".{name}.state.json")
+
+def load_state(output_path):
+    """Watermark of the last successful run, or an empty state"""
+    path = _state_path(output_path)
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+def save_state(output_path, state):
+    path = _state_path(output_path)
+    with open(f"{path}.tmp", 'w') as f:
+        json.dump(state, f, indent=2)
+    os.replace(f"{path}.tmp", path)
+
+def _point_query(table, since=None, sample=None):
+    query = sql.SQL("""
+        SELECT id, lat, lon, risk_score, risk_label, data_source, created_at,
+               COALESCE(updated_at, created_at) AS updated_at
+        FROM {table}
+    """).format(table=sql.Identifier(table))
+    params = []
+    if since is not None:
+        query += sql.SQL(" WHERE COALESCE(updated_at, created_at) > %s")
+        params.append(since)
+    if sample:
+        query += sql.SQL(" ORDER BY random() LIMIT %s")
+        params.append(sample)
+    else:
+        query += sql.SQL(" ORDER BY id")
+    return query, params
+
+def _featurize_chunk(points):
+    raw_features = get_ml_features_batch(points['lat'].to_numpy(float), points['lon'].to_numpy(float))
+    if raw_features is None:
+        raise RuntimeError(f"Feature extraction failed for ids {points['id'].iloc[0]}-{points['id'].iloc[-1]}")
+
+    features = pd.DataFrame(build_feature_matrix(raw_features), columns=FEATURE_NAMES)
+    for column in FEATURE_NAMES:
+        if column in raw_features:
+            features[column] = raw_features[column].to_numpy()
+    features['boundary_penalty'] = features['boundary_penalty'].astype(int)
+
+    rows = pd.concat([points[['id', 'lat', 'lon']].reset_index(drop=True), features,
+                      points[LABEL_COLUMNS].reset_index(drop=True)], axis=1)
+    return rows[OUTPUT_COLUMNS]
+
+def build_training_data(output_path, table='ml_training_data', incremental=True, sample=None,
+                        chunk_size=2000, n_workers=4):
+    """Materialize training rows from PostGIS, streaming chunks to disk as workers finish.
+
+    Labeled points are read from `table`; features for each chunk are computed
+    with a single get_ml_features_batch call on a worker thread. With
+    incremental=True only rows whose updated_at (created_at if never updated)
+    is newer than the previous run's watermark are recomputed and merged into
+    the existing output.
+    """
+    if n_workers >= DB_POOL_MAX:
+        raise ValueError(f"n_workers ({n_workers}) must be below DB_POOL_MAX ({DB_POOL_MAX}); "
+                         "one pooled connection streams the point list")
+
+    state = load_state(output_path) if incremental and os.path.exists(output_path) else {}
+    since = state.get('max_updated_at')
+    if since in ('None', 'NaT'):
+        # Written by older runs that stringified a missing timestamp; rebuild from scratch
+        since = None
+    print(f"🚀 Building training data from {table}" + (f" (rows updated after {since})" if since else ""))
+
+    parts_path = f"{output_path}.parts"
+    if os.path.exists(parts_path):
+        os.remove(parts_path)
+
+    started = time.perf_counter()
+    written = 0
+    max_updated_at = pd.Timestamp(since) if since is not None else None
+    query, params = _point_query(table, since=since, sample=sample)
+
+    def write(rows):
+        nonlocal written, max_updated_at
+        rows.to_csv(parts_path, mode='a', header=written == 0, index=False)
+        written += len(rows)
+        # Compared as datetimes; a row without any timestamp must not become the watermark
+        updated = rows['updated_at'].dropna()
+        if len(updated) and (max_updated_at is None or updated.max() > max_updated_at):
+            max_updated_at = updated.max()
+        print(f"  {written} rows written ({time.perf_counter() - started:.1f}s)")
+
+    with get_db_connection() as conn, ThreadPoolExecutor(max_workers=n_workers) as pool:
+        # A named cursor streams the point list instead of loading it all at once
+        cursor = conn.cursor(name='training_points')
+        cursor.itersize = chunk_size
+        cursor.execute(query, params)
+
+        pending = set()
+        while True:
+            chunk = cursor.fetchmany(chunk_size)
+            if chunk:
+                points = pd.DataFrame(chunk, columns=['id', 'lat', 'lon'] + LABEL_COLUMNS)
+                points['updated_at'] = pd.to_datetime(points['updated_at'])
+                points['created_at'] = pd.to_datetime(points['created_at'])
+                pending.add(pool.submit(_featurize_chunk, points))
+            # Keep at most two chunks per worker in flight so memory stays bounded
+            while pending and (len(pending) >= 2 * n_workers or not chunk):
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    write(future.result())
+            if not chunk:
+                break
+        cursor.close()
+
+    if written == 0:
+        print("✅ Training data is up to date")
+        return output_path
+
+    new_rows = pd.read_csv(parts_path)
+    if since is not None:
+        # Incremental refresh: replace recomputed ids, keep everything else
+        existing = pd.read_csv(output_path)
+        existing = existing[~existing['id'].isin(new_rows['id'])]
+        new_rows = pd.concat([existing, new_rows], ignore_index=True)
+    new_rows = new_rows.sort_values('id')
+    new_rows.to_csv(f"{output_path}.tmp", index=False)
+    os.replace(f"{output_path}.tmp", output_path)
+    os.remove(parts_path)
+
+    if not sample:
+        # A sampled run skips older rows, so it must not advance the incremental watermark
+        save_state(output_path, {'max_updated_at': max_updated_at.isoformat() if max_updated_at is not None else None,
+                                 'table': table, 'rows': len(new_rows)})
+    print(f"💾 {written} rows recomputed, {len(new_rows)} total saved to: {output_path}")
+    return output_path
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Materialize ML training rows from PostGIS")
+    parser.add_argument('--output', default="data/ML_training_data.csv")
+    parser.add_argument('--table', default="ml_training_data", help="Table of labeled points")
+    parser.add_argument('--full', action='store_true', help="Recompute every row instead of only updated ones")
+    parser.add_argument('--sample', type=int, default=None, help="Only materialize a random sample of N points")
+    parser.add_argument('--chunk-size', type=int, default=2000)
+    parser.add_argument('--workers', type=int, default=4)
+    args = parser.parse_args()
+
+    build_training_data(args.output, table=args.table, incremental=not args.full, sample=args.sample,
+                        chunk_size=args.chunk_size, n_workers=args.workers)
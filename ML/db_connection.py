@@ -1,30 +1,153 @@
+import json
+import os
+import threading
+import time
 import psycopg2
+import psycopg2.errors
+import psycopg2.extensions
+from psycopg2 import pool
 import pandas as pd
 from contextlib import contextmanager
 import numpy as np
+from features import RAW_FEATURE_NAMES
+from geofence import inside_assam_boundary
+from instrumentation import inc, status, timer
 
+# Credentials come from the environment; a missing password falls back to libpq (PGPASSWORD / .pgpass)
 DB_CONFIG = {
-    'host': 'localhost',
-    'port': 5432,
-    'database': 'safe_tourism',
-    'user': 'postgres',
-    'password': 'qpalzm@19'
+    'host': os.environ.get('DB_HOST', 'localhost'),
+    'port': int(os.environ.get('DB_PORT', 5432)),
+    'database': os.environ.get('DB_NAME', 'safe_tourism'),
+    'user': os.environ.get('DB_USER', 'postgres'),
 }
+if os.environ.get('DB_PASSWORD'):
+    DB_CONFIG['password'] = os.environ['DB_PASSWORD']
+
+# (min_lat, max_lat, min_lon, max_lon); the true border check lives in geofence
+ASSAM_BBOX = (24.0, 28.0, 89.5, 96.0)
+
+DB_POOL_MIN = int(os.environ.get('DB_POOL_MIN', 1))
+DB_POOL_MAX = int(os.environ.get('DB_POOL_MAX', 10))
+# Seconds a checkout waits for a free connection once all DB_POOL_MAX are in use
+DB_CHECKOUT_TIMEOUT = float(os.environ.get('DB_CHECKOUT_TIMEOUT', 30))
+# Connections returned idle within this many seconds are handed out again without a SELECT 1 probe
+DB_HEALTHCHECK_INTERVAL = float(os.environ.get('DB_HEALTHCHECK_INTERVAL', 30))
+
+_pool = None
+_pool_lock = threading.Lock()
+
+class BlockingConnectionPool(pool.ThreadedConnectionPool):
+    """ThreadedConnectionPool whose getconn waits for a free connection instead of raising PoolError at once"""
+
+    def __init__(self, minconn, maxconn, *args, timeout=DB_CHECKOUT_TIMEOUT, **kwargs):
+        super().__init__(minconn, maxconn, *args, **kwargs)
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(maxconn)
+        self._returned_at = {}
+
+    def getconn(self, key=None):
+        if not self._slots.acquire(timeout=self.timeout):
+            inc('db_checkout_timeouts_total')
+            raise pool.PoolError(f"No free database connection after {self.timeout}s "
+                                 f"({self.maxconn} in use, see DB_POOL_MAX)")
+        try:
+            return super().getconn(key)
+        except Exception:
+            self._slots.release()
+            raise
+
+    def putconn(self, conn=None, key=None, close=False):
+        try:
+            if close or conn.closed:
+                self._returned_at.pop(id(conn), None)
+            else:
+                self._returned_at[id(conn)] = time.monotonic()
+            super().putconn(conn, key, close)
+        finally:
+            self._slots.release()
+
+    def needs_probe(self, conn):
+        """True unless conn came back idle within DB_HEALTHCHECK_INTERVAL seconds"""
+        returned_at = self._returned_at.get(id(conn))
+        return (returned_at is None or time.monotonic() - returned_at > DB_HEALTHCHECK_INTERVAL
+                or conn.info.transaction_status != psycopg2.extensions.TRANSACTION_STATUS_IDLE)
+
+def get_connection_pool():
+    """Return the process-wide connection pool, creating it on first use"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = BlockingConnectionPool(DB_POOL_MIN, DB_POOL_MAX, **DB_CONFIG)
+    return _pool
+
+def close_connection_pool():
+    """Close every pooled connection; the next checkout creates a fresh pool"""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.closeall()
+            _pool = None
+
+def discard_connection_pool():
+    """Forget the pool without closing it; call in a forked child so it never uses the parent's sockets"""
+    global _pool
+    _pool = None
+
+@contextmanager
+def _autocommit(conn):
+    """Run statements without the BEGIN psycopg2 sends first and the ROLLBACK putconn sends after"""
+    conn.autocommit = True
+    try:
+        yield conn
+    finally:
+        if not conn.closed:
+            conn.autocommit = False
+
+def _is_healthy(conn):
+    if conn.closed:
+        return False
+    try:
+        if conn.info.transaction_status != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+            conn.rollback()
+        # One round trip instead of BEGIN + SELECT 1 + ROLLBACK
+        with _autocommit(conn), conn.cursor() as cursor:
+            cursor.execute("SELECT 1")
+        return True
+    except psycopg2.Error:
+        return False
+
+def _checkout(db_pool):
+    # Connections not used recently are probed; stale ones (e.g. after a server restart) are replaced.
+    # A recently used connection that has since died fails its first query and is discarded on return.
+    for _ in range(DB_POOL_MAX + 1):
+        conn = db_pool.getconn()
+        if not db_pool.needs_probe(conn) or _is_healthy(conn):
+            return conn
+        inc('db_connections_discarded_total')
+        db_pool.putconn(conn, close=True)
+    raise psycopg2.OperationalError("Could not obtain a healthy database connection from the pool")
 
 @contextmanager
 def get_db_connection():
+    db_pool = None
     conn = None
     try:
-        conn = psycopg2.connect(**DB_CONFIG)
+        db_pool = get_connection_pool()
+        with timer('db_checkout'):
+            conn = _checkout(db_pool)
         yield conn
     except Exception as e:
         print(f"Database connection error: {e}")
-        if conn:
-            conn.rollback()
+        if conn and not conn.closed:
+            try:
+                conn.rollback()
+            except psycopg2.Error:
+                pass
         raise
     finally:
         if conn:
-            conn.close()
+            db_pool.putconn(conn, close=bool(conn.closed))
 
 def test_connection():
     try:
@@ -38,92 +161,273 @@ def test_connection():
         print(f"❌ Connection failed: {e}")
         return False
 
+def get_table_signature():
+    """Cheap change marker for hazard_zone_ml and pois based on their write counters"""
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT relname, n_tup_ins, n_tup_upd, n_tup_del
+            FROM pg_stat_user_tables
+            WHERE relname IN ('hazard_zone_ml', 'pois')
+            ORDER BY relname
+        """)
+        return [list(row) for row in cursor.fetchall()]
+
+def build_feature_dicts(lat, lon, hazard_basic, hazard_counts, hospital_basic, poi_counts):
+    """Turn the raw feature query rows into the hazard/POI feature dicts"""
+    inside_assam = 1 if inside_assam_boundary(lat, lon) else 0
+    
+    hazard_features = {
+        'dist_nearest_hazard_m': float(hazard_basic[0]) if hazard_basic[0] is not None else 99999,
+        'nearest_hazard_weight': float(hazard_basic[1]) if hazard_basic[1] else 0,
+        'high_danger_zones_1km': int(hazard_counts[0]) if hazard_counts[0] else 0,
+        'industrial_hazards_1km': int(hazard_counts[1]) if hazard_counts[1] else 0,
+        'military_zones_1km': int(hazard_counts[2]) if hazard_counts[2] else 0,
+        'water_hazards_500m': int(hazard_counts[3]) if hazard_counts[3] else 0,
+        'weighted_hazard_score_1km': float(hazard_counts[4]) if hazard_counts[4] else 0,
+        'inside_assam_boundary': bool(inside_assam)
+    }
+    
+    poi_features = {
+        'dist_nearest_hospital_m': float(hospital_basic[0]) if hospital_basic[0] is not None else 99999,
+        'nearest_hospital_weight': float(hospital_basic[1]) if hospital_basic[1] else 0,
+        'hospitals_within_2km': int(poi_counts[0]) if poi_counts[0] else 0,
+        'weighted_safety_score_1km': float(poi_counts[1]) if poi_counts[1] else 0
+    }
+    
+    return hazard_features, poi_features
+
+SQL_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'sql')
+
+# Lateral fragments over a point row `pt` with an EPSG:3857 `geom`. The KNN (<->) ordering and the
+# ST_DWithin filters both use the GiST indexes from sql/feature_indexes.sql.
+NEAREST_HAZARD_SQL = """
+    SELECT ST_Distance(h.geometry, pt.geom) AS dist, h.danger_weight
+    FROM hazard_zone_ml h
+    ORDER BY h.geometry <-> pt.geom
+    LIMIT 1
+"""
+
+HAZARD_COUNTS_SQL = """
+    SELECT
+        COUNT(*) FILTER (WHERE h.danger_weight > 0.7) AS high_danger_zones_1km,
+        COUNT(*) FILTER (WHERE h.zone_type = 'industrial') AS industrial_hazards_1km,
+        COUNT(*) FILTER (WHERE h.military IS NOT NULL) AS military_zones_1km,
+        COUNT(*) FILTER (WHERE (h."natural" = 'water' OR h.landuse = 'reservoir')
+                         AND ST_DWithin(h.geometry, pt.geom, 500)) AS water_hazards_500m,
+        COALESCE(SUM(h.danger_weight), 0) AS weighted_hazard_score_1km
+    FROM hazard_zone_ml h
+    WHERE ST_DWithin(h.geometry, pt.geom, 1000)
+"""
+
+NEAREST_HOSPITAL_SQL = """
+    SELECT ST_Distance(p.geometry, pt.geom) AS dist, p.safety_weight
+    FROM pois p
+    WHERE p.amenity = 'hospital'
+    ORDER BY p.geometry <-> pt.geom
+    LIMIT 1
+"""
+
+POI_COUNTS_SQL = """
+    SELECT
+        COUNT(*) FILTER (WHERE p.amenity = 'hospital') AS hospitals_within_2km,
+        COALESCE(SUM(p.safety_weight) FILTER (WHERE ST_DWithin(p.geometry, pt.geom, 1000)), 0)
+            AS weighted_safety_score_1km
+    FROM pois p
+    WHERE ST_DWithin(p.geometry, pt.geom, 2000)
+"""
+
+# The point is transformed once; $1 is lon and $2 is lat
+POINT_SQL = "SELECT ST_Transform(ST_SetSRID(ST_MakePoint($1::float8, $2::float8), 4326), 3857) AS geom"
+
+HAZARD_COLUMNS = """
+        nearest_hazard.dist, nearest_hazard.danger_weight,
+        hazard_counts.high_danger_zones_1km, hazard_counts.industrial_hazards_1km,
+        hazard_counts.military_zones_1km, hazard_counts.water_hazards_500m,
+        hazard_counts.weighted_hazard_score_1km"""
+
+POI_COLUMNS = """
+        nearest_hospital.dist, nearest_hospital.safety_weight,
+        poi_counts.hospitals_within_2km, poi_counts.weighted_safety_score_1km"""
+
+HAZARD_JOINS = f"""
+    LEFT JOIN LATERAL ({NEAREST_HAZARD_SQL}) nearest_hazard ON true
+    CROSS JOIN LATERAL ({HAZARD_COUNTS_SQL}) hazard_counts"""
+
+POI_JOINS = f"""
+    LEFT JOIN LATERAL ({NEAREST_HOSPITAL_SQL}) nearest_hospital ON true
+    CROSS JOIN LATERAL ({POI_COUNTS_SQL}) poi_counts"""
+
+# Standalone hazard and POI statements, so they can run concurrently on separate connections
+HAZARD_FEATURES_SQL = f"WITH pt AS ({POINT_SQL}) SELECT {HAZARD_COLUMNS} FROM pt {HAZARD_JOINS}"
+POI_FEATURES_SQL = f"WITH pt AS ({POINT_SQL}) SELECT {POI_COLUMNS} FROM pt {POI_JOINS}"
+
+# Everything in one round trip: hazard columns, then POI columns
+FEATURES_SQL = f"WITH pt AS ({POINT_SQL}) SELECT {HAZARD_COLUMNS}, {POI_COLUMNS} FROM pt {HAZARD_JOINS} {POI_JOINS}"
+
+FEATURES_STATEMENT = 'ml_features'
+
+# Raw feature names of the FEATURES_SQL / BATCH_FEATURES_SQL columns, in select order
+FEATURE_ROW_COLUMNS = [
+    'dist_nearest_hazard_m', 'nearest_hazard_weight', 'high_danger_zones_1km', 'industrial_hazards_1km',
+    'military_zones_1km', 'water_hazards_500m', 'weighted_hazard_score_1km',
+    'dist_nearest_hospital_m', 'nearest_hospital_weight', 'hospitals_within_2km', 'weighted_safety_score_1km'
+]
+
+def split_feature_row(row):
+    """Split a FEATURES_SQL row (or a hazard row + POI row) into the build_feature_dicts inputs"""
+    return tuple(row[0:2]), tuple(row[2:7]), tuple(row[7:9]), tuple(row[9:11])
+
+def _execute_features(cursor, lon, lat):
+    # Prepared statements are per connection, so every pooled connection prepares on first use
+    try:
+        cursor.execute(f"EXECUTE {FEATURES_STATEMENT}(%s, %s)", (lon, lat))
+    except psycopg2.errors.InvalidSqlStatementName:
+        cursor.connection.rollback()
+        cursor.execute(f"PREPARE {FEATURES_STATEMENT}(float8, float8) AS {FEATURES_SQL}")
+        cursor.execute(f"EXECUTE {FEATURES_STATEMENT}(%s, %s)", (lon, lat))
+    return cursor.fetchone()
+
+def _read(query):
+    """Run query(cursor) on a pooled connection in autocommit.
+
+    Recently used connections skip the health probe, so one that died since
+    (e.g. a server restart) fails here; the read is retried once on a fresh one.
+    """
+    for attempt in range(2):
+        try:
+            with get_db_connection() as conn, _autocommit(conn):
+                return query(conn.cursor())
+        except psycopg2.OperationalError:
+            if attempt:
+                raise
+            inc('db_read_retries_total')
+
 def get_ml_features(lat, lon):
     try:
-        with get_db_connection() as conn:
-            cursor = conn.cursor()
-            print(f"🔍 Extracting features for location: {lat}, {lon}")
-            
-            # Get nearest hazard
-            cursor.execute("""
-                SELECT 
-                    COALESCE(MIN(ST_Distance(geometry, ST_Transform(ST_SetSRID(ST_MakePoint(%s, %s), 4326), 3857))), 99999) as dist_nearest_hazard_m,
-                    COALESCE((SELECT danger_weight FROM hazard_zone_ml 
-                             ORDER BY ST_Distance(geometry, ST_Transform(ST_SetSRID(ST_MakePoint(%s, %s), 4326), 3857))
-                             LIMIT 1), 0) as nearest_hazard_weight
-                FROM hazard_zone_ml
-            """, (lon, lat, lon, lat))
-            hazard_basic = cursor.fetchone()
-            
-            # Get hazard counts
-            cursor.execute("""
-                SELECT 
-                    COUNT(CASE WHEN danger_weight > 0.7 AND 
-                          ST_DWithin(geometry, ST_Transform(ST_SetSRID(ST_MakePoint(%s, %s), 4326), 3857), 1000) THEN 1 END) as high_danger_zones_1km,
-                    COUNT(CASE WHEN zone_type = 'industrial' AND 
-                          ST_DWithin(geometry, ST_Transform(ST_SetSRID(ST_MakePoint(%s, %s), 4326), 3857), 1000) THEN 1 END) as industrial_hazards_1km,
-                    COUNT(CASE WHEN military IS NOT NULL AND 
-                          ST_DWithin(geometry, ST_Transform(ST_SetSRID(ST_MakePoint(%s, %s), 4326), 3857), 1000) THEN 1 END) as military_zones_1km,
-                    COUNT(CASE WHEN ("natural" = 'water' OR landuse = 'reservoir') AND 
-                          ST_DWithin(geometry, ST_Transform(ST_SetSRID(ST_MakePoint(%s, %s), 4326), 3857), 500) THEN 1 END) as water_hazards_500m,
-                    COALESCE(SUM(CASE WHEN ST_DWithin(geometry, ST_Transform(ST_SetSRID(ST_MakePoint(%s, %s), 4326), 3857), 1000) 
-                                 THEN danger_weight ELSE 0 END), 0) as weighted_hazard_score_1km
-                FROM hazard_zone_ml
-            """, (lon, lat, lon, lat, lon, lat, lon, lat, lon, lat))
-            hazard_counts = cursor.fetchone()
-            
-            # Get nearest hospital
-            cursor.execute("""
-                SELECT 
-                    COALESCE(MIN(ST_Distance(geometry, ST_Transform(ST_SetSRID(ST_MakePoint(%s, %s), 4326), 3857))), 99999) as dist_nearest_hospital_m,
-                    COALESCE((SELECT safety_weight FROM pois 
-                             WHERE amenity = 'hospital'
-                             ORDER BY ST_Distance(geometry, ST_Transform(ST_SetSRID(ST_MakePoint(%s, %s), 4326), 3857))
-                             LIMIT 1), 0) as nearest_hospital_weight
-                FROM pois
-                WHERE amenity = 'hospital'
-            """, (lon, lat, lon, lat))
-            hospital_basic = cursor.fetchone()
-            
-            # Get POI counts
-            cursor.execute("""
-                SELECT 
-                    COUNT(CASE WHEN amenity = 'hospital' AND 
-                          ST_DWithin(geometry, ST_Transform(ST_SetSRID(ST_MakePoint(%s, %s), 4326), 3857), 2000) THEN 1 END) as hospitals_within_2km,
-                    COALESCE(SUM(CASE WHEN ST_DWithin(geometry, ST_Transform(ST_SetSRID(ST_MakePoint(%s, %s), 4326), 3857), 1000) 
-                                 THEN safety_weight ELSE 0 END), 0) as weighted_safety_score_1km
-                FROM pois
-            """, (lon, lat, lon, lat))
-            poi_counts = cursor.fetchone()
-            
-            # Parse results
-            inside_assam = 1 if (24.0 <= lat <= 28.0 and 89.5 <= lon <= 96.0) else 0
-            
-            hazard_features = {
-                'dist_nearest_hazard_m': float(hazard_basic[0]) if hazard_basic[0] else 99999,
-                'nearest_hazard_weight': float(hazard_basic[1]) if hazard_basic[1] else 0,
-                'high_danger_zones_1km': int(hazard_counts[0]) if hazard_counts[0] else 0,
-                'industrial_hazards_1km': int(hazard_counts[1]) if hazard_counts[1] else 0,
-                'military_zones_1km': int(hazard_counts[2]) if hazard_counts[2] else 0,
-                'water_hazards_500m': int(hazard_counts[3]) if hazard_counts[3] else 0,
-                'weighted_hazard_score_1km': float(hazard_counts[4]) if hazard_counts[4] else 0,
-                'inside_assam_boundary': bool(inside_assam)
-            }
-            
-            poi_features = {
-                'dist_nearest_hospital_m': float(hospital_basic[0]) if hospital_basic[0] else 99999,
-                'nearest_hospital_weight': float(hospital_basic[1]) if hospital_basic[1] else 0,
-                'hospitals_within_2km': int(poi_counts[0]) if poi_counts[0] else 0,
-                'weighted_safety_score_1km': float(poi_counts[1]) if poi_counts[1] else 0
-            }
-            
-            print("✅ Feature extraction successful!")
-            return hazard_features, poi_features
+        status(f"🔍 Extracting features for location: {lat}, {lon}")
+        with timer('query_features'):
+            row = _read(lambda cursor: _execute_features(cursor, lon, lat))
+        
+        with timer('feature_dicts'):
+            hazard_features, poi_features = build_feature_dicts(lat, lon, *split_feature_row(row))
+        
+        status("✅ Feature extraction successful!")
+        return hazard_features, poi_features
             
     except Exception as e:
+        inc('feature_errors_total', path='single')
         print(f"❌ Error: {e}")
         return None, None
 
+BATCH_FEATURES_SQL = f"""
+    WITH pts AS (
+        SELECT p.ord, ST_Transform(ST_SetSRID(ST_MakePoint(p.lon, p.lat), 4326), 3857) AS geom
+        FROM unnest(%s::float8[], %s::float8[]) WITH ORDINALITY AS p(lon, lat, ord)
+    )
+    SELECT {HAZARD_COLUMNS}, {POI_COLUMNS}
+    FROM pts AS pt {HAZARD_JOINS} {POI_JOINS}
+    ORDER BY pt.ord
+"""
+
+def create_feature_indexes():
+    """Apply sql/feature_indexes.sql; safe to run repeatedly"""
+    with open(os.path.join(SQL_DIR, 'feature_indexes.sql')) as f:
+        ddl = f.read()
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(ddl)
+        conn.commit()
+    status("✅ Feature indexes are in place")
+
+FEATURE_TABLES = ('hazard_zone_ml', 'pois')
+
+def _plan_nodes(plan, found):
+    found.append(plan)
+    for child in plan.get('Plans', []):
+        _plan_nodes(child, found)
+    return found
+
+def check_query_plan(lat=26.1445, lon=91.7362):
+    """Return the (table, node type, detail) problems in the feature statement's plan; empty means it passes.
+
+    Every scan of hazard_zone_ml and pois must be index-backed, and the
+    nearest-hazard and nearest-hospital lookups must be KNN index scans
+    ordered by <-> inside the index; a sort followed by a limit fails.
+    Sequential scans are disabled for the EXPLAIN, so small development
+    tables still show whether each lookup can use an index.
+    """
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        _execute_features(cursor, lon, lat)
+        cursor.execute("SET LOCAL enable_seqscan = off")
+        cursor.execute(f"EXPLAIN (FORMAT JSON) EXECUTE {FEATURES_STATEMENT}(%s, %s)", (lon, lat))
+        plan = cursor.fetchone()[0]
+        conn.rollback()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+
+    problems = []
+    knn_tables = set()
+    for node in _plan_nodes(plan[0]['Plan'], []):
+        node_type = node['Node Type']
+        table = node.get('Relation Name')
+        sort_keys = [key for key in node.get('Sort Key', []) if '<->' in key]
+        if node_type == 'Sort' and sort_keys:
+            problems.append((None, node_type, ', '.join(sort_keys)))
+        if table not in FEATURE_TABLES:
+            continue
+        if node_type not in ('Index Scan', 'Index Only Scan', 'Bitmap Heap Scan'):
+            problems.append((table, node_type, node.get('Index Name')))
+        elif '<->' in node.get('Order By', ''):
+            knn_tables.add(table)
+
+    problems.extend((table, 'no KNN index scan', None) for table in FEATURE_TABLES if table not in knn_tables)
+    return problems
+
+def get_ml_features_batch(lats, lons):
+    """Extract the 12 raw features for many points in one SQL round trip.
+    
+    Returns a DataFrame in input order with lat, lon and RAW_FEATURE_NAMES,
+    using the same defaults as get_ml_features.
+    """
+    lats = np.asarray(lats, dtype=float)
+    lons = np.asarray(lons, dtype=float)
+    if lats.shape != lons.shape:
+        raise ValueError(f"lats and lons must have the same shape, got {lats.shape} and {lons.shape}")
+    
+    rows = []
+    try:
+        if len(lats):
+            def query(cursor):
+                cursor.execute(BATCH_FEATURES_SQL, (lons.tolist(), lats.tolist()))
+                return cursor.fetchall()
+            
+            status(f"🔍 Extracting features for {len(lats)} locations")
+            with timer('query_batch'):
+                rows = _read(query)
+    except Exception as e:
+        inc('feature_errors_total', path='batch')
+        print(f"❌ Error: {e}")
+        return None
+    
+    raw = pd.DataFrame(rows, columns=FEATURE_ROW_COLUMNS, dtype=float)
+    features = pd.DataFrame({'lat': lats, 'lon': lons})
+    for column in RAW_FEATURE_NAMES[:-1]:
+        # Match get_ml_features: missing distances fall back to 99999, everything else to 0. A zero
+        # distance means the point is inside the hazard zone (or on the hospital), not missing.
+        if column.startswith('dist_'):
+            features[column] = raw[column].fillna(99999).to_numpy()
+        else:
+            features[column] = raw[column].fillna(0).to_numpy()
+    for column in ['high_danger_zones_1km', 'hospitals_within_2km', 'industrial_hazards_1km',
+                   'military_zones_1km', 'water_hazards_500m']:
+        features[column] = features[column].astype(int)
+    features['inside_assam_boundary'] = inside_assam_boundary(lats, lons)
+    
+    status("✅ Batch feature extraction successful!")
+    return features
+
 if __name__ == "__main__":
     if test_connection():
         lat, lon = 26.1445, 91.7362
@@ -135,6 +439,12 @@ if __name__ == "__main__":
             print(f"POI features: {poi_data}")
         else:
             print("❌ Failed")
+        
+        problems = check_query_plan(lat, lon)
+        if problems:
+            print(f"❌ Feature query plan problems: {problems}")
+        else:
+            print("✅ Feature query plan uses index scans and KNN ordering")
 
 
 
@@ -0,0 +1,160 @@
+import json
+import numpy as np
+import xgboost as xgb
+
+class CompiledEnsemble:
+    """Soft-voting XGBoost ensemble flattened into NumPy arrays.
+
+    All trees of all members are evaluated together in one vectorized pass per
+    tree level. The StandardScaler is folded into the split thresholds, so
+    predictions take raw (unscaled) feature matrices.
+    """
+
+    def __init__(self, boosters, scaler, classes, weights=None):
+        self.classes = np.asarray(classes)
+        n_classes = len(self.classes)
+        n_members = len(boosters)
+
+        mean = getattr(scaler, 'mean_', None)
+        scale = getattr(scaler, 'scale_', None)
+
+        features, thresholds, lefts, rights, default_left, values, groups = [], [], [], [], [], [], []
+        offset = 0
+        max_depth = 0
+        for member, booster in enumerate(boosters):
+            model = json.loads(booster.save_raw('json'))
+            gbm = model['learner']['gradient_booster']
+            if gbm['name'] != 'gbtree':
+                raise ValueError(f"Only gbtree boosters can be compiled, got {gbm['name']}")
+
+            for tree, class_index in zip(gbm['model']['trees'], gbm['model']['tree_info']):
+                left = np.asarray(tree['left_children'], dtype=np.int64)
+                right = np.asarray(tree['right_children'], dtype=np.int64)
+                feature = np.asarray(tree['split_indices'], dtype=np.int64)
+                condition = np.asarray(tree['split_conditions'], dtype=np.float64)
+                is_leaf = left == -1
+                node_ids = np.arange(len(left))
+
+                # XGBoost tests float32(z) < t on scaled inputs z. That holds exactly when z is below the
+                # midpoint between t and the float32 just under it, which then folds into raw units:
+                # (x - mean) / scale < mid  <=>  x < mid * scale + mean
+                t32 = condition.astype(np.float32)
+                threshold = (t32.astype(np.float64) + np.nextafter(t32, np.float32(-np.inf)).astype(np.float64)) / 2
+                split = ~is_leaf
+                if scale is not None:
+                    threshold[split] = threshold[split] * scale[feature[split]]
+                if mean is not None:
+                    threshold[split] = threshold[split] + mean[feature[split]]
+
+                # Leaves point at themselves so every row can take the same number of steps
+                features.append(np.where(is_leaf, 0, feature))
+                thresholds.append(np.where(is_leaf, np.inf, threshold))
+                lefts.append(np.where(is_leaf, node_ids, left) + offset)
+                rights.append(np.where(is_leaf, node_ids, right) + offset)
+                default_left.append(np.asarray(tree['default_left'], dtype=bool))
+                values.append(np.where(is_leaf, condition, 0.0))
+                groups.append(member * n_classes + class_index)
+                max_depth = max(max_depth, _tree_depth(left, right))
+                offset += len(left)
+
+        self.feature = np.concatenate(features)
+        self.threshold = np.concatenate(thresholds)
+        self.left = np.concatenate(lefts)
+        self.right = np.concatenate(rights)
+        self.default_left = np.concatenate(default_left)
+        self.value = np.concatenate(values)
+        self.roots = np.cumsum([0] + [len(f) for f in features[:-1]])
+        self.max_depth = max_depth
+        self.n_members = n_members
+        self.n_classes = n_classes
+
+        # Sums leaf values of each (member, class) group of trees with one matmul
+        self.group_matrix = np.zeros((len(groups), n_members * n_classes))
+        self.group_matrix[np.arange(len(groups)), groups] = 1.0
+
+        member_weights = np.ones(n_members) if weights is None else np.asarray(weights, dtype=float)
+        self.member_weights = member_weights / member_weights.sum()
+
+        # XGBoost's intercept (base_score) representation varies by version, so recover it from
+        # the margin output: margin(x) minus the leaves XGBoost itself selected for a reference row
+        n_features = len(scale) if scale is not None else boosters[0].num_features()
+        reference = np.zeros((1, n_features)) if scaler is None else scaler.transform(np.zeros((1, n_features)))
+        groups = np.asarray(groups)
+        self.intercept = np.zeros(n_members * n_classes)
+        first_tree = 0
+        for booster in boosters:
+            matrix = xgb.DMatrix(reference)
+            margin = booster.predict(matrix, output_margin=True).reshape(-1)
+            leaves = booster.predict(matrix, pred_leaf=True).reshape(-1).astype(np.int64)
+            trees = np.arange(first_tree, first_tree + len(leaves))
+            leaf_sums = np.bincount(groups[trees], weights=self.value[self.roots[trees] + leaves],
+                                    minlength=n_members * n_classes)
+            member_groups = np.unique(groups[trees])
+            self.intercept[member_groups] = margin - leaf_sums[member_groups]
+            first_tree += len(leaves)
+
+    @classmethod
+    def from_predictor(cls, predictor):
+        """Compile the ensemble of an ExplainableTouristRiskPredictor"""
+        ensemble = predictor.ensemble_model
+        boosters = [estimator.get_booster() for estimator in ensemble.estimators_]
+        return cls(boosters, predictor.scaler, predictor.label_encoder.classes_, weights=ensemble.weights)
+
+    def _leaf_margins(self, features):
+        features = np.asarray(features, dtype=np.float64)
+        rows = np.arange(len(features))[:, None]
+        nodes = np.broadcast_to(self.roots, (len(features), len(self.roots)))
+        for _ in range(self.max_depth):
+            values = features[rows, self.feature[nodes]]
+            go_left = np.where(np.isnan(values), self.default_left[nodes], values < self.threshold[nodes])
+            nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+        return self.value[nodes] @ self.group_matrix
+
+    def predict_proba(self, features):
+        """Soft-voted class probabilities for an (n, 19) raw feature matrix"""
+        margins = self._leaf_margins(features) + self.intercept
+        margins = margins.reshape(len(margins), self.n_members, self.n_classes)
+        margins -= margins.max(axis=2, keepdims=True)
+        member_proba = np.exp(margins)
+        member_proba /= member_proba.sum(axis=2, keepdims=True)
+        return np.tensordot(member_proba, self.member_weights, axes=([1], [0]))
+
+    def predict(self, features):
+        """Return (probabilities, decoded labels) from a single pass"""
+        proba = self.predict_proba(features)
+        return proba, self.classes[np.argmax(proba, axis=1)]
+
+def _tree_depth(left, right):
+    depth = np.zeros(len(left), dtype=np.int64)
+    for node in range(len(left)):
+        if left[node] != -1:
+            depth[left[node]] = depth[node] + 1
+            depth[right[node]] = depth[node] + 1
+    return int(depth.max())
+
+def check_parity(predictor, features, compiled=None):
+    """Compare compiled and sklearn ensemble outputs; returns (max |dproba|, label agreement)"""
+    compiled = compiled or CompiledEnsemble.from_predictor(predictor)
+    features = np.asarray(features, dtype=float)
+    expected = predictor.ensemble_model.predict_proba(predictor.scaler.transform(features))
+    actual, labels = compiled.predict(features)
+    expected_labels = predictor.label_encoder.inverse_transform(np.argmax(expected, axis=1))
+    return float(np.max(np.abs(actual - expected))), float(np.mean(labels == expected_labels))
+
+if __name__ == "__main__":
+    from train_model import DEFAULT_MODEL_PATH, ExplainableTouristRiskPredictor
+    from features import FEATURE_NAMES
+
+    import pandas as pd
+
+    predictor = ExplainableTouristRiskPredictor()
+    predictor.load_model(DEFAULT_MODEL_PATH)
+    features = pd.read_csv("data/ML_training_data.csv")[FEATURE_NAMES].to_numpy(dtype=float)
+
+    max_diff, agreement = check_parity(predictor, features)
+    print(f"📊 Max probability difference: {max_diff:.2e}")
+    print(f"🎯 Label agreement: {agreement:.4%}")
+    if max_diff < 1e-4 and agreement == 1.0:
+        print("✅ Compiled ensemble matches VotingClassifier")
+    else:
+        print("❌ Compiled ensemble diverges from VotingClassifier")
@@ -0,0 +1,89 @@
+import numpy as np
+
+RAW_FEATURE_NAMES = [
+    'dist_nearest_hazard_m', 'nearest_hazard_weight',
+    'dist_nearest_hospital_m', 'nearest_hospital_weight',
+    'high_danger_zones_1km', 'hospitals_within_2km',
+    'industrial_hazards_1km', 'military_zones_1km', 'water_hazards_500m',
+    'weighted_hazard_score_1km', 'weighted_safety_score_1km',
+    'inside_assam_boundary'
+]
+
+FEATURE_NAMES = RAW_FEATURE_NAMES + [
+    'hazard_to_safety_ratio', 'hospital_accessibility',
+    'hazard_proximity', 'safety_density', 'boundary_penalty',
+    'critical_hazard_exposure', 'emergency_response_score'
+]
+
+# Explicit storage dtypes of the model features in the training data
+FEATURE_DTYPES = {
+    'dist_nearest_hazard_m': 'float64',
+    'nearest_hazard_weight': 'float64',
+    'dist_nearest_hospital_m': 'float64',
+    'nearest_hospital_weight': 'float64',
+    'high_danger_zones_1km': 'int64',
+    'hospitals_within_2km': 'int64',
+    'industrial_hazards_1km': 'int64',
+    'military_zones_1km': 'int64',
+    'water_hazards_500m': 'int64',
+    'weighted_hazard_score_1km': 'float64',
+    'weighted_safety_score_1km': 'float64',
+    'inside_assam_boundary': 'bool',
+    'hazard_to_safety_ratio': 'float64',
+    'hospital_accessibility': 'float64',
+    'hazard_proximity': 'float64',
+    'safety_density': 'float64',
+    'boundary_penalty': 'int64',
+    'critical_hazard_exposure': 'float64',
+    'emergency_response_score': 'float64'
+}
+
+def build_feature_matrix(raw):
+    """Build the (n, 19) model input from columns of the 12 raw features.
+
+    `raw` is anything indexable by feature name (DataFrame, dict of arrays or
+    dict of scalars); the derived features are computed column-wise.
+    """
+    def column(name):
+        return np.asarray(raw[name], dtype=float).reshape(-1)
+
+    dist_hazard = column('dist_nearest_hazard_m')
+    hazard_weight = column('nearest_hazard_weight')
+    dist_hospital = column('dist_nearest_hospital_m')
+    hospital_weight = column('nearest_hospital_weight')
+    high_danger = column('high_danger_zones_1km')
+    hospitals = column('hospitals_within_2km')
+    industrial = column('industrial_hazards_1km')
+    military = column('military_zones_1km')
+    water = column('water_hazards_500m')
+    hazard_score = column('weighted_hazard_score_1km')
+    safety_score = column('weighted_safety_score_1km')
+    inside_assam = column('inside_assam_boundary')
+
+    return np.column_stack([
+        dist_hazard,
+        hazard_weight,
+        dist_hospital,
+        hospital_weight,
+        high_danger,
+        hospitals,
+        industrial,
+        military,
+        water,
+        hazard_score,
+        safety_score,
+        inside_assam,
+        # Computed features
+        hazard_score / (safety_score + 0.001),
+        1 / (dist_hospital + 1),
+        1 / (dist_hazard + 1),
+        hospitals / (high_danger + 1),
+        1 - inside_assam,
+        military * 0.8 + industrial * 0.6,
+        (hospitals * hospital_weight) / (dist_hospital + 1)
+    ])
+
+def build_feature_vector(hazard_features, poi_features):
+    """Build the (1, 19) model input for a single location's feature dicts"""
+    return build_feature_matrix({**hazard_features, **poi_features})
+
@@ -0,0 +1,176 @@
+import json
+import os
+from functools import lru_cache
+import numpy as np
+
+ASSAM_POLY_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'geofencing', 'assam.poly')
+
+OUTSIDE, INSIDE, BOUNDARY = 0, 1, 2
+
+EARTH_MEAN_RADIUS_M = 6371008.8
+
+def load_rings(path):
+    """Read polygon rings as (k, 2) lon/lat arrays from an Osmosis .poly or GeoJSON file"""
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Geofence file not found: {path}")
+
+    if path.endswith('.geojson') or path.endswith('.json'):
+        with open(path) as f:
+            collection = json.load(f)
+        rings = []
+        for feature in collection['features']:
+            geometry = feature['geometry']
+            polygons = geometry['coordinates'] if geometry['type'] == 'MultiPolygon' else [geometry['coordinates']]
+            for polygon in polygons:
+                rings.extend(np.asarray(ring, dtype=float)[:, :2] for ring in polygon)
+        return rings
+
+    # .poly: a name line, then sections of "lon lat" lines each closed by END ("!name" marks a hole)
+    rings = []
+    with open(path) as f:
+        lines = [line.strip() for line in f][1:]
+    ring = None
+    for line in lines:
+        if not line:
+            continue
+        if ring is None:
+            if line == 'END':
+                break
+            ring = []
+        elif line == 'END':
+            rings.append(np.asarray(ring, dtype=float))
+            ring = None
+        else:
+            ring.append([float(v) for v in line.split()[:2]])
+    return rings
+
+class Geofence:
+    """Vectorized point-in-polygon test over a raster of inside/outside/boundary cells.
+
+    Points in cells no edge touches are resolved by a single lookup. Points in
+    boundary cells run an exact crossing-number test against only the edges
+    that overlap their raster row. Holes and multiple rings follow the even-odd
+    rule.
+    """
+
+    def __init__(self, rings, grid_size=512):
+        starts = np.vstack([ring for ring in rings])
+        ends = np.vstack([np.roll(ring, -1, axis=0) for ring in rings])
+        keep = np.any(starts != ends, axis=1)
+        self.x0, self.y0 = starts[keep, 0], starts[keep, 1]
+        self.x1, self.y1 = ends[keep, 0], ends[keep, 1]
+
+        self.min_x, self.max_x = min(self.x0.min(), self.x1.min()), max(self.x0.max(), self.x1.max())
+        self.min_y, self.max_y = min(self.y0.min(), self.y1.min()), max(self.y0.max(), self.y1.max())
+        self.nx = self.ny = grid_size
+        self.cell_w = (self.max_x - self.min_x) / self.nx
+        self.cell_h = (self.max_y - self.min_y) / self.ny
+
+        edge_col0 = self._cols(np.minimum(self.x0, self.x1))
+        edge_col1 = self._cols(np.maximum(self.x0, self.x1))
+        edge_row0 = self._rows(np.minimum(self.y0, self.y1))
+        edge_row1 = self._rows(np.maximum(self.y0, self.y1))
+
+        # Edges per raster row, padded with a NaN sentinel edge that never crosses
+        buckets = [[] for _ in range(self.ny)]
+        for edge, (r0, r1) in enumerate(zip(edge_row0, edge_row1)):
+            for row in range(r0, r1 + 1):
+                buckets[row].append(edge)
+        sentinel = len(self.x0)
+        width = max(1, max(len(bucket) for bucket in buckets))
+        self.row_edges = np.full((self.ny, width), sentinel, dtype=np.int64)
+        for row, bucket in enumerate(buckets):
+            self.row_edges[row, :len(bucket)] = bucket
+        self.x0, self.y0 = np.append(self.x0, np.nan), np.append(self.y0, np.nan)
+        self.x1, self.y1 = np.append(self.x1, np.nan), np.append(self.y1, np.nan)
+
+        # Any cell overlapped by an edge's bounding box is a boundary cell
+        self.cells = np.zeros((self.ny, self.nx), dtype=np.int8)
+        for r0, r1, c0, c1 in zip(edge_row0, edge_row1, edge_col0, edge_col1):
+            self.cells[r0:r1 + 1, c0:c1 + 1] = BOUNDARY
+
+        # Every other cell lies entirely on one side; its centre decides which
+        rows, cols = np.nonzero(self.cells != BOUNDARY)
+        centre_x = self.min_x + (cols + 0.5) * self.cell_w
+        centre_y = self.min_y + (rows + 0.5) * self.cell_h
+        self.cells[rows, cols] = np.where(self._crossing_test(centre_x, centre_y, rows), INSIDE, OUTSIDE)
+
+    @classmethod
+    def from_file(cls, path=ASSAM_POLY_PATH, grid_size=512):
+        return cls(load_rings(path), grid_size=grid_size)
+
+    def _cols(self, x):
+        return np.clip(((x - self.min_x) / self.cell_w).astype(np.int64), 0, self.nx - 1)
+
+    def _rows(self, y):
+        return np.clip(((y - self.min_y) / self.cell_h).astype(np.int64), 0, self.ny - 1)
+
+    def _crossing_test(self, x, y, rows):
+        edges = self.row_edges[rows]
+        x0, y0, x1, y1 = self.x0[edges], self.y0[edges], self.x1[edges], self.y1[edges]
+        y = y[:, None]
+        straddles = (y0 > y) != (y1 > y)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            crossing_x = x0 + (y - y0) * (x1 - x0) / (y1 - y0)
+        crossings = straddles & (x[:, None] < crossing_x)
+        return (np.count_nonzero(crossings, axis=1) % 2) == 1
+
+    def contains(self, lats, lons):
+        """Boolean mask of points inside the polygon; accepts scalars or arrays"""
+        scalar = np.ndim(lats) == 0 and np.ndim(lons) == 0
+        y = np.atleast_1d(np.asarray(lats, dtype=float)).ravel()
+        x = np.atleast_1d(np.asarray(lons, dtype=float)).ravel()
+
+        inside = np.zeros(len(x), dtype=bool)
+        in_bbox = np.flatnonzero((x >= self.min_x) & (x <= self.max_x) & (y >= self.min_y) & (y <= self.max_y))
+        if len(in_bbox):
+            rows = self._rows(y[in_bbox])
+            state = self.cells[rows, self._cols(x[in_bbox])]
+            inside[in_bbox] = state == INSIDE
+
+            boundary = state == BOUNDARY
+            if boundary.any():
+                points = in_bbox[boundary]
+                inside[points] = self._crossing_test(x[points], y[points], rows[boundary])
+
+        if scalar:
+            return bool(inside[0])
+        return inside.reshape(np.shape(lats))
+
+def haversine_m(lat1, lon1, lat2, lon2):
+    """Great-circle distance in metres; works on scalars and NumPy arrays"""
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_MEAN_RADIUS_M * np.arcsin(np.sqrt(a))
+
+@lru_cache(maxsize=None)
+def get_assam_geofence():
+    """Process-wide Assam geofence, built from geofencing/assam.poly on first use"""
+    return Geofence.from_file(ASSAM_POLY_PATH)
+
+def inside_assam_boundary(lat, lon):
+    """True-border Assam check; works on scalars and NumPy arrays"""
+    return get_assam_geofence().contains(lat, lon)
+
+if __name__ == "__main__":
+    import time
+
+    geofence = get_assam_geofence()
+    rng = np.random.default_rng(42)
+    n = 5_000_000
+    lats = rng.uniform(geofence.min_y - 0.5, geofence.max_y + 0.5, n)
+    lons = rng.uniform(geofence.min_x - 0.5, geofence.max_x + 0.5, n)
+
+    started = time.perf_counter()
+    inside = geofence.contains(lats, lons)
+    elapsed = time.perf_counter() - started
+    print(f"⚡ {n:,} points in {elapsed:.3f}s ({n / elapsed / 1e6:.1f}M points/s), {inside.mean():.1%} inside")
+
+    try:
+        import shapely
+        polygon = shapely.Polygon(load_rings(ASSAM_POLY_PATH)[0])
+        sample = slice(0, 200_000)
+        expected = shapely.contains_xy(polygon, lons[sample], lats[sample])
+        print(f"🎯 Agreement with shapely: {np.mean(expected == inside[sample]):.6%}")
+    except ImportError:
+        pass
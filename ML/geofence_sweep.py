@@ -0,0 +1,206 @@
+import time
+import numpy as np
+import pandas as pd
+import shapely
+from shapely import STRtree
+
+from features import build_feature_matrix
+from geofence import get_assam_geofence
+from instrumentation import inc, status, timer
+from risk_service import get_service
+from spatial_index import to_web_mercator
+from train_model import DEFAULT_MODEL_PATH
+
+# Zone kind -> alert radius in metres, matching the thresholds of the corresponding model features
+ZONE_RADII_M = {'high_danger': 1000.0, 'military': 1000.0, 'water': 500.0}
+
+VIOLATION_COLUMNS = ['tourist_id', 'zone', 'hazard_index', 'distance_m']
+
+class ZoneIndex:
+    """Geometries of the alerting hazard kinds from one FeatureSnapshot, with an STRtree per kind"""
+
+    def __init__(self, snapshot):
+        self.snapshot = snapshot
+        masks = {
+            'high_danger': snapshot.danger_weight > 0.7,
+            'military': snapshot.is_military,
+            'water': snapshot.is_water
+        }
+        self.zones = []
+        for zone, radius in ZONE_RADII_M.items():
+            hazard_index = np.flatnonzero(masks[zone])
+            geoms = snapshot.hazard_geoms[hazard_index]
+            self.zones.append((zone, radius, hazard_index, geoms, STRtree(geoms)))
+
+def _expand_cells(cell_index, cell_starts, cell_counts, order):
+    """Positions of every tourist in the given cells, plus which input entry each came from"""
+    counts = cell_counts[cell_index]
+    source = np.repeat(np.arange(len(cell_index)), counts)
+    within = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    return order[cell_starts[cell_index][source] + within], source
+
+class GeofenceSweep:
+    """Check a whole population of tourists against the hazard zones and the Assam boundary per tick.
+
+    Tourists are binned into a cell_size_m grid in EPSG:3857. Each occupied
+    cell is queried once against the zone trees (widened by the zone radius),
+    and only tourists in cells with candidates get an exact distance, so the
+    cost follows the number of occupied cells rather than the population.
+    Distances are EPSG:3857 metres, the same units the model features use.
+    """
+
+    def __init__(self, engine, cell_size_m=1000.0, geofence=None, feature_source=None,
+                 model_path=DEFAULT_MODEL_PATH):
+        self.engine = engine
+        self.cell_size_m = cell_size_m
+        self.geofence = geofence or get_assam_geofence()
+        self.feature_source = feature_source or engine.get_ml_features_batch
+        self.model_path = model_path
+        self._zone_index = None
+
+    @property
+    def zone_index(self):
+        # Rebuilt only when the engine has swapped in a new snapshot
+        snapshot = self.engine.snapshot
+        if self._zone_index is None or self._zone_index.snapshot is not snapshot:
+            self._zone_index = ZoneIndex(snapshot)
+        return self._zone_index
+
+    def sweep(self, tourist_ids, lats, lons):
+        """DataFrame of (tourist_id, zone, hazard_index, distance_m) violations.
+
+        Each tourist gets at most one row per zone kind, for the closest
+        hazard of that kind within its radius. Tourists outside Assam get an
+        'outside_assam' row with a NaN distance and hazard_index of -1.
+        """
+        tourist_ids = np.asarray(tourist_ids)
+        lats = np.asarray(lats, dtype=float)
+        lons = np.asarray(lons, dtype=float)
+        zone_index = self.zone_index
+
+        with timer('sweep_bin'):
+            x, y = to_web_mercator(lats, lons)
+            cells = np.column_stack([np.floor(x / self.cell_size_m), np.floor(y / self.cell_size_m)])
+            occupied, cell_of = np.unique(cells, axis=0, return_inverse=True)
+            cell_of = cell_of.reshape(-1)
+            order = np.argsort(cell_of, kind='stable')
+            cell_counts = np.bincount(cell_of, minlength=len(occupied))
+            cell_starts = np.cumsum(cell_counts) - cell_counts
+            boxes = shapely.box(occupied[:, 0] * self.cell_size_m, occupied[:, 1] * self.cell_size_m,
+                                (occupied[:, 0] + 1) * self.cell_size_m, (occupied[:, 1] + 1) * self.cell_size_m)
+
+        frames = []
+        for zone, radius, hazard_index, geoms, tree in zone_index.zones:
+            if len(geoms) == 0:
+                continue
+            with timer('sweep_candidates', zone=zone):
+                cell_index, candidate = tree.query(boxes, predicate='dwithin', distance=radius)
+                tourists, source = _expand_cells(cell_index, cell_starts, cell_counts, order)
+                candidate = candidate[source]
+            if len(tourists) == 0:
+                continue
+            with timer('sweep_distance', zone=zone):
+                distance = shapely.distance(shapely.points(x[tourists], y[tourists]), geoms[candidate])
+            hit = distance <= radius
+            frames.append(pd.DataFrame({
+                'tourist': tourists[hit],
+                'zone': zone,
+                'hazard_index': hazard_index[candidate[hit]],
+                'distance_m': distance[hit]
+            }))
+
+        with timer('sweep_boundary'):
+            outside = np.flatnonzero(~self.geofence.contains(lats, lons))
+        frames.append(pd.DataFrame({'tourist': outside, 'zone': 'outside_assam', 'hazard_index': -1,
+                                    'distance_m': np.nan}))
+
+        violations = pd.concat(frames, ignore_index=True)
+        violations = (violations.sort_values(['tourist', 'zone', 'distance_m'], kind='stable')
+                      .drop_duplicates(['tourist', 'zone']))
+        violations.insert(0, 'tourist_id', tourist_ids[violations['tourist'].to_numpy()])
+        for zone, count in violations['zone'].value_counts().items():
+            inc('sweep_violations_total', int(count), zone=zone)
+        return violations.drop(columns='tourist').reset_index(drop=True)[VIOLATION_COLUMNS]
+
+    def tick(self, tourist_ids, lats, lons):
+        """Sweep the population, then run the full risk model on the flagged tourists only.
+
+        Returns (violations, scored), where scored has one row per flagged
+        tourist: tourist_id, lat, lon and the predict_batch_features columns.
+        """
+        started = time.perf_counter()
+        tourist_ids = np.asarray(tourist_ids)
+        lats = np.asarray(lats, dtype=float)
+        lons = np.asarray(lons, dtype=float)
+        violations = self.sweep(tourist_ids, lats, lons)
+
+        flagged = np.flatnonzero(np.isin(tourist_ids, violations['tourist_id'].unique()))
+        scored = None
+        if len(flagged):
+            raw = self.feature_source(lats[flagged], lons[flagged])
+            if raw is None:
+                raise RuntimeError(f"Feature extraction failed for {len(flagged)} flagged tourists")
+            predictor = get_service(self.model_path).get_predictor()
+            scored = predictor.predict_batch_features(build_feature_matrix(raw))
+            scored.insert(0, 'lon', lons[flagged])
+            scored.insert(0, 'lat', lats[flagged])
+            scored.insert(0, 'tourist_id', tourist_ids[flagged])
+
+        status(f"🚧 Swept {len(tourist_ids)} tourists: {len(violations)} violation(s), "
+               f"{len(flagged)} scored, {(time.perf_counter() - started) * 1000:.0f}ms")
+        return violations, scored
+
+def brute_force_violations(snapshot, tourist_ids, lats, lons, geofence=None):
+    """Per-tourist reference for GeofenceSweep.sweep: every tourist against every zone geometry"""
+    geofence = geofence or get_assam_geofence()
+    zone_index = ZoneIndex(snapshot)
+    rows = []
+    for tourist_id, lat, lon in zip(tourist_ids, lats, lons):
+        point = shapely.Point(*to_web_mercator(lat, lon))
+        for zone, radius, hazard_index, geoms, _ in zone_index.zones:
+            if len(geoms) == 0:
+                continue
+            distance = shapely.distance(point, geoms)
+            closest = int(np.argmin(distance))
+            if distance[closest] <= radius:
+                rows.append((tourist_id, zone, int(hazard_index[closest]), float(distance[closest])))
+        if not geofence.contains(lat, lon):
+            rows.append((tourist_id, 'outside_assam', -1, np.nan))
+    return pd.DataFrame(rows, columns=VIOLATION_COLUMNS)
+
+if __name__ == "__main__":
+    from benchmark import make_fixtures, sample_points
+    from spatial_index import SpatialFeatureEngine
+
+    hazard_zones, pois, centres = make_fixtures()
+    engine = SpatialFeatureEngine.from_records(hazard_zones, pois)
+    sweeper = GeofenceSweep(engine)
+
+    # The sweep must agree with the per-tourist reference on a subset
+    lats, lons = sample_points(centres, 2000)
+    ids = np.arange(len(lats))
+    expected = brute_force_violations(engine.snapshot, ids, lats, lons)
+    actual = sweeper.sweep(ids, lats, lons)
+    key = ['tourist_id', 'zone']
+    merged = expected.merge(actual, on=key, how='outer', suffixes=('_expected', '_actual'), indicator=True)
+    mismatched = merged[(merged['_merge'] != 'both') |
+                        ~np.isclose(merged['distance_m_expected'], merged['distance_m_actual'], equal_nan=True)]
+    if len(mismatched):
+        print(f"❌ {len(mismatched)} violations differ from the per-tourist reference:")
+        print(mismatched.head(10))
+    else:
+        print(f"✅ Sweep matches the per-tourist reference: {len(actual)} violations over {len(ids)} tourists")
+
+    violations, scored = sweeper.tick(ids, lats, lons)
+    print(f"🚨 {int(scored['alert_needed'].sum())} of {len(scored)} flagged tourists need an alert")
+
+    for n in (10_000, 50_000):
+        lats, lons = sample_points(centres, n, seed=n)
+        ids = np.arange(n)
+        for attempt in ('cold', 'warm'):
+            started = time.perf_counter()
+            violations = sweeper.sweep(ids, lats, lons)
+            swept = time.perf_counter() - started
+            print(f"⏱️  {n} tourists ({attempt}): sweep {swept * 1000:.0f}ms, {len(violations)} violations, "
+                  f"{violations['tourist_id'].nunique()} tourists flagged")
+        print(f"   {violations['zone'].value_counts().to_dict()}")
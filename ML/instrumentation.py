@@ -0,0 +1,240 @@
+import bisect
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Status lines are on by default; ML_VERBOSE=0 silences them (errors are still printed)
+VERBOSE = os.environ.get('ML_VERBOSE', '1').lower() not in ('0', 'false', 'no', 'off')
+
+METRIC_PREFIX = 'safe_tourism_'
+
+# Upper bounds in seconds: spans sub-millisecond model calls up to slow spatial queries
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25,
+                   0.5, 1.0, 2.5, 5.0, 10.0)
+
+def set_verbose(enabled):
+    """Turn the emoji status lines on or off at runtime"""
+    global VERBOSE
+    VERBOSE = bool(enabled)
+
+def status(message):
+    """Print a status line unless verbose output is switched off"""
+    if VERBOSE:
+        print(message)
+
+def _label_key(labels):
+    return tuple(sorted(labels.items()))
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus layout"""
+
+    __slots__ = ('bounds', 'counts', 'sum', 'count')
+
+    def __init__(self, bounds=LATENCY_BUCKETS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-quantile (inf if it falls past the last bucket)"""
+        if self.count == 0:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.bounds + (float('inf'),), self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float('inf')
+
+class InMemorySink:
+    """Keeps counters and histograms in process; render_prometheus() exposes them as text"""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counters = {}
+        self.histograms = {}
+        self._lock = threading.Lock()
+
+    def inc(self, name, labels, value):
+        key = (name, _label_key(labels))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name, labels, value):
+        key = (name, _label_key(labels))
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram(self.buckets)
+            histogram.observe(value)
+
+    def reset(self):
+        with self._lock:
+            self.counters.clear()
+            self.histograms.clear()
+
+    def dump_state(self):
+        """Raw counters and bucket counts as JSON-safe data, for merge_state() in another process"""
+        with self._lock:
+            return {
+                'counters': [[name, list(labels), value] for (name, labels), value in self.counters.items()],
+                'histograms': [[name, list(labels), list(h.counts), h.sum, h.count]
+                               for (name, labels), h in self.histograms.items()]
+            }
+
+    def merge_state(self, state):
+        """Add a dump_state() result (e.g. from another worker process) into this sink"""
+        with self._lock:
+            for name, labels, value in state['counters']:
+                key = (name, tuple(tuple(pair) for pair in labels))
+                self.counters[key] = self.counters.get(key, 0) + value
+            for name, labels, counts, total, count in state['histograms']:
+                key = (name, tuple(tuple(pair) for pair in labels))
+                histogram = self.histograms.get(key)
+                if histogram is None:
+                    histogram = self.histograms[key] = Histogram(self.buckets)
+                histogram.counts = [a + b for a, b in zip(histogram.counts, counts)]
+                histogram.sum += total
+                histogram.count += count
+
+    def snapshot(self):
+        """Plain-dict copy: {'counters': {...}, 'histograms': {...}} keyed by name{labels}"""
+        with self._lock:
+            return {
+                'counters': {_series(name, labels): value for (name, labels), value in self.counters.items()},
+                'histograms': {
+                    _series(name, labels): {
+                        'count': h.count,
+                        'sum': h.sum,
+                        'p50': h.quantile(0.50),
+                        'p95': h.quantile(0.95),
+                        'p99': h.quantile(0.99)
+                    }
+                    for (name, labels), h in self.histograms.items()
+                }
+            }
+
+    def render_prometheus(self):
+        """Prometheus text exposition format (version 0.0.4)"""
+        lines = []
+        with self._lock:
+            for metric in sorted({name for name, _ in self.counters}):
+                lines.append(f"# TYPE {METRIC_PREFIX}{metric} counter")
+                for (name, labels), value in sorted(self.counters.items()):
+                    if name == metric:
+                        lines.append(f"{METRIC_PREFIX}{_series(name, labels)} {value}")
+
+            for metric in sorted({name for name, _ in self.histograms}):
+                lines.append(f"# TYPE {METRIC_PREFIX}{metric} histogram")
+                for (name, labels), h in sorted(self.histograms.items()):
+                    if name != metric:
+                        continue
+                    cumulative = 0
+                    for bound, count in zip(h.bounds + (float('inf'),), h.counts):
+                        cumulative += count
+                        le = '+Inf' if bound == float('inf') else repr(bound)
+                        lines.append(f"{METRIC_PREFIX}{_series(name + '_bucket', labels + (('le', le),))} "
+                                     f"{cumulative}")
+                    lines.append(f"{METRIC_PREFIX}{_series(name + '_sum', labels)} {h.sum}")
+                    lines.append(f"{METRIC_PREFIX}{_series(name + '_count', labels)} {h.count}")
+        return '\n'.join(lines) + '\n'
+
+def _series(name, labels):
+    if not labels:
+        return name
+    rendered = ','.join(f'{key}="{value}"' for key, value in labels)
+    return f"{name}{{{rendered}}}"
+
+class LoggingSink:
+    """Emits every observation as a DEBUG record on the safe_tourism.metrics logger"""
+
+    def __init__(self, logger=None):
+        self.logger = logger or logging.getLogger('safe_tourism.metrics')
+
+    def inc(self, name, labels, value):
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug("%s +%s", _series(name, _label_key(labels)), value)
+
+    def observe(self, name, labels, value):
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug("%s %.6f", _series(name, _label_key(labels)), value)
+
+# The default sink backs get_metrics() and the Prometheus endpoint
+_default_sink = InMemorySink()
+_sinks = [_default_sink]
+
+def get_metrics():
+    """The process-wide in-memory sink"""
+    return _default_sink
+
+def add_sink(sink):
+    """Also send every metric to sink (anything with inc(name, labels, value) and observe(...))"""
+    global _sinks
+    _sinks = _sinks + [sink]
+
+def remove_sink(sink):
+    global _sinks
+    _sinks = [s for s in _sinks if s is not sink]
+
+def inc(name, value=1, **labels):
+    """Increment a counter"""
+    for sink in _sinks:
+        sink.inc(name, labels, value)
+
+def observe(name, value, **labels):
+    """Record one histogram observation"""
+    for sink in _sinks:
+        sink.observe(name, labels, value)
+
+@contextmanager
+def timer(stage, **labels):
+    """Record the wall-clock duration of the block in the stage_seconds histogram"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe('stage_seconds', time.perf_counter() - started, stage=stage, **labels)
+
+def timed(stage):
+    """Decorator form of timer()"""
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with timer(stage):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def start_metrics_server(port=9108, host='0.0.0.0', sink=None):
+    """Serve sink (the default in-memory sink) as Prometheus text on /metrics from a daemon thread"""
+    sink = sink or _default_sink
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?')[0] != '/metrics':
+                self.send_error(404)
+                return
+            body = sink.render_prometheus().encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
@@ -0,0 +1,135 @@
+import argparse
+import http.client
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+from multiprocessing import Pool
+import numpy as np
+import pandas as pd
+
+from features import RAW_FEATURE_NAMES
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+def _request(port, path, payload=None):
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    try:
+        if payload is None:
+            conn.request('GET', path)
+        else:
+            conn.request('POST', path, body=json.dumps(payload), headers={'Content-Type': 'application/json'})
+        response = conn.getresponse()
+        return response.status, response.read()
+    finally:
+        conn.close()
+
+def load_payloads(csv_path, n=1000, seed=42):
+    """/score request bodies built from rows of the training data"""
+    df = pd.read_csv(csv_path)
+    df = df.sample(min(n, len(df)), random_state=seed)
+    payloads = []
+    for _, row in df.iterrows():
+        features = {name: float(row[name]) for name in RAW_FEATURE_NAMES}
+        features['inside_assam_boundary'] = bool(row['inside_assam_boundary'])
+        payloads.append({'lat': float(row['lat']), 'lon': float(row['lon']), 'features': features,
+                         'explain': False})
+    return payloads
+
+def _client(args):
+    """One client process: sequential requests until the deadline; returns per-request latencies"""
+    port, payloads, deadline, offset = args
+    latencies, errors = [], 0
+    i = offset
+    while time.time() < deadline:
+        started = time.perf_counter()
+        try:
+            status, _ = _request(port, '/score', payloads[i % len(payloads)])
+        except OSError:
+            status = None
+        if status == 200:
+            latencies.append(time.perf_counter() - started)
+        else:
+            errors += 1
+        i += 1
+    return latencies, errors
+
+def run_load(port, payloads, concurrency, duration):
+    """Drive the server with `concurrency` client processes for `duration` seconds"""
+    deadline = time.time() + duration
+    with Pool(concurrency) as pool:
+        results = pool.map(_client, [(port, payloads, deadline, k * 97) for k in range(concurrency)])
+    latencies = np.concatenate([np.asarray(r[0]) for r in results]) if results else np.array([])
+    errors = sum(r[1] for r in results)
+    if len(latencies) == 0:
+        return {'requests': 0, 'errors': errors}
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) * 1000
+    return {
+        'requests': int(len(latencies)),
+        'errors': errors,
+        'throughput_rps': len(latencies) / duration,
+        'p50_ms': float(p50),
+        'p95_ms': float(p95),
+        'p99_ms': float(p99)
+    }
+
+def start_server(workers, threads_per_worker, model_path):
+    port = _free_port()
+    command = [sys.executable, 'serve.py', '--port', str(port), '--workers', str(workers),
+               '--threads-per-worker', str(threads_per_worker), '--model', model_path]
+    process = subprocess.Popen(command, cwd=os.path.dirname(os.path.abspath(__file__)))
+    for _ in range(600):
+        try:
+            if _request(port, '/health')[0] == 200:
+                return process, port
+        except OSError:
+            pass
+        if process.poll() is not None:
+            raise RuntimeError(f"Server exited with status {process.returncode}")
+        time.sleep(0.1)
+    process.terminate()
+    raise RuntimeError("Server did not become healthy")
+
+if __name__ == "__main__":
+    from train_model import DEFAULT_MODEL_PATH
+
+    cores = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description="Throughput of serve.py as the worker count grows")
+    parser.add_argument('--workers', type=int, nargs='+',
+                        default=sorted({1, max(1, cores // 2), cores}), help="Worker counts to test")
+    parser.add_argument('--threads-per-worker', type=int, default=1)
+    parser.add_argument('--concurrency', type=int, default=None, help="Client processes (default: 2 x workers)")
+    parser.add_argument('--duration', type=float, default=10.0)
+    parser.add_argument('--csv', default="data/ML_training_data.csv")
+    parser.add_argument('--model', default=DEFAULT_MODEL_PATH)
+    parser.add_argument('--output', default=None, help="Write the results as JSON")
+    args = parser.parse_args()
+
+    payloads = load_payloads(args.csv)
+    results = []
+    print(f"🔥 Load testing /score on {cores} core(s)")
+    for workers in args.workers:
+        process, port = start_server(workers, args.threads_per_worker, args.model)
+        try:
+            concurrency = args.concurrency or 2 * workers
+            result = run_load(port, payloads, concurrency, args.duration)
+        finally:
+            process.terminate()
+            process.wait()
+        result.update({'workers': workers, 'threads_per_worker': args.threads_per_worker,
+                       'concurrency': concurrency})
+        results.append(result)
+        baseline = results[0].get('throughput_rps') or 1
+        print(f"  {workers:3d} worker(s): {result.get('throughput_rps', 0):8.1f} req/s "
+              f"(x{result.get('throughput_rps', 0) / baseline:.2f})  p50 {result.get('p50_ms', 0):.2f}ms  "
+              f"p99 {result.get('p99_ms', 0):.2f}ms  errors {result['errors']}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'cores': cores, 'results': results}, f, indent=2)
+        print(f"💾 Load test results saved to: {args.output}")
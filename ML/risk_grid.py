@@ -0,0 +1,208 @@
+import argparse
+import json
+import os
+import shutil
+import threading
+import time
+from functools import lru_cache
+import numpy as np
+
+from db_connection import ASSAM_BBOX, get_ml_features_batch, get_table_signature
+from features import build_feature_matrix
+from predict_risk import explain_feature
+from risk_service import artifact_signature, get_service
+from train_model import DEFAULT_MODEL_PATH
+
+GRID_FORMAT_VERSION = 1
+TOP_EXPLANATIONS = 5
+
+def build_risk_grid(output_dir, resolution=0.01, model_path=DEFAULT_MODEL_PATH,
+                    feature_source=get_ml_features_batch, chunk_size=5000):
+    """Precompute label, probabilities and top explanations on a lat/lon grid over the Assam bbox.
+
+    `feature_source(lats, lons)` returns the raw feature frame for a chunk of
+    points (get_ml_features_batch by default). The grid is written to a
+    temporary directory and swapped in when complete.
+    """
+    min_lat, max_lat, min_lon, max_lon = ASSAM_BBOX
+    lats = np.round(np.arange(min_lat, max_lat + resolution / 2, resolution), 6)
+    lons = np.round(np.arange(min_lon, max_lon + resolution / 2, resolution), 6)
+    grid_lats, grid_lons = [a.ravel() for a in np.meshgrid(lats, lons, indexing='ij')]
+    n_cells = len(grid_lats)
+
+    predictor = get_service(model_path).get_predictor()
+    classes = list(predictor.label_encoder.classes_)
+    # Record the input signatures before computing, so changes during the build mark the grid stale
+    data_signature = get_table_signature()
+    model_signature = list(artifact_signature(os.path.abspath(model_path)))
+
+    labels = np.empty(n_cells, dtype=np.int8)
+    proba = np.empty((n_cells, len(classes)), dtype=np.float32)
+    top_features = np.empty((n_cells, TOP_EXPLANATIONS), dtype=np.int8)
+    top_values = np.empty((n_cells, TOP_EXPLANATIONS), dtype=np.float32)
+
+    print(f"🗺️  Building {len(lats)}x{len(lons)} risk grid at {resolution}° resolution")
+    started = time.perf_counter()
+    for start in range(0, n_cells, chunk_size):
+        chunk = slice(start, min(start + chunk_size, n_cells))
+        raw_features = feature_source(grid_lats[chunk], grid_lons[chunk])
+        if raw_features is None:
+            raise RuntimeError(f"Feature extraction failed for grid cells {chunk.start}-{chunk.stop}")
+
+        features = build_feature_matrix(raw_features)
+        chunk_proba = predictor.predict_proba_features(features)
+        # Every cell is unique, so the explanation cache would only churn
+        contributions = predictor.explain_batch(features, cache=False)
+        top = np.argsort(contributions, axis=1)[:, ::-1][:, :TOP_EXPLANATIONS]
+
+        labels[chunk] = np.argmax(chunk_proba, axis=1)
+        proba[chunk] = chunk_proba
+        top_features[chunk] = top
+        top_values[chunk] = np.take_along_axis(features, top, axis=1)
+        print(f"  {chunk.stop}/{n_cells} cells ({time.perf_counter() - started:.1f}s)")
+
+    shape = (len(lats), len(lons))
+    staging_dir = f"{output_dir}.tmp"
+    shutil.rmtree(staging_dir, ignore_errors=True)
+    os.makedirs(staging_dir)
+    np.save(os.path.join(staging_dir, 'labels.npy'), labels.reshape(shape))
+    np.save(os.path.join(staging_dir, 'proba.npy'), proba.reshape(shape + (len(classes),)))
+    np.save(os.path.join(staging_dir, 'top_features.npy'), top_features.reshape(shape + (TOP_EXPLANATIONS,)))
+    np.save(os.path.join(staging_dir, 'top_values.npy'), top_values.reshape(shape + (TOP_EXPLANATIONS,)))
+    with open(os.path.join(staging_dir, 'meta.json'), 'w') as f:
+        json.dump({
+            'format_version': GRID_FORMAT_VERSION,
+            'bbox': list(ASSAM_BBOX),
+            'resolution': resolution,
+            'shape': list(shape),
+            'classes': classes,
+            'feature_names': list(predictor.feature_names),
+            'model_path': os.path.abspath(model_path),
+            'model_signature': model_signature,
+            'data_signature': data_signature,
+            'built_at': time.time()
+        }, f, indent=2)
+
+    previous_dir = f"{output_dir}.old"
+    shutil.rmtree(previous_dir, ignore_errors=True)
+    if os.path.exists(output_dir):
+        os.replace(output_dir, previous_dir)
+    os.replace(staging_dir, output_dir)
+    shutil.rmtree(previous_dir, ignore_errors=True)
+
+    print(f"💾 Risk grid saved to: {output_dir}")
+    return output_dir
+
+class RiskGrid:
+    """Nearest-cell lookup into a precomputed, memory-mapped risk grid.
+
+    Lookups return None outside the grid or once the grid is stale (the model
+    artifact or the hazard/POI tables changed since it was built); callers then
+    fall back to predict_tourist_risk.
+    """
+
+    def __init__(self, grid_dir, cache_size=1024, check_interval=60.0):
+        self.grid_dir = grid_dir
+        self.cache_size = cache_size
+        self.check_interval = check_interval
+        self._check_lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        with open(os.path.join(self.grid_dir, 'meta.json')) as f:
+            self.meta = json.load(f)
+        self.labels = np.load(os.path.join(self.grid_dir, 'labels.npy'), mmap_mode='r')
+        self.proba = np.load(os.path.join(self.grid_dir, 'proba.npy'), mmap_mode='r')
+        self.top_features = np.load(os.path.join(self.grid_dir, 'top_features.npy'), mmap_mode='r')
+        self.top_values = np.load(os.path.join(self.grid_dir, 'top_values.npy'), mmap_mode='r')
+        self.stale = False
+        self._last_check = time.monotonic()
+        self._cell = lru_cache(maxsize=self.cache_size)(self._cell_prediction)
+
+    def is_stale(self):
+        """True if the model artifact or the hazard/POI tables changed since the build"""
+        model_path = self.meta['model_path']
+        if not os.path.exists(model_path):
+            return True
+        if list(artifact_signature(model_path)) != self.meta['model_signature']:
+            return True
+        return get_table_signature() != self.meta['data_signature']
+
+    def check(self):
+        """Re-check staleness; reload from disk if the grid was rebuilt meanwhile"""
+        with self._check_lock:
+            self._last_check = time.monotonic()
+            try:
+                with open(os.path.join(self.grid_dir, 'meta.json')) as f:
+                    on_disk = json.load(f)
+                if on_disk.get('built_at') != self.meta.get('built_at'):
+                    self._load()
+                self.stale = self.is_stale()
+            except Exception as e:
+                print(f"❌ Risk grid check failed, treating grid as stale: {e}")
+                self.stale = True
+            if self.stale:
+                self._cell.cache_clear()
+        return not self.stale
+
+    def cell_index(self, lat, lon):
+        """Nearest grid cell (row, col) for a coordinate, or None outside the grid"""
+        min_lat, max_lat, min_lon, max_lon = self.meta['bbox']
+        if not (min_lat <= lat <= max_lat and min_lon <= lon <= max_lon):
+            return None
+        resolution = self.meta['resolution']
+        rows, cols = self.meta['shape']
+        row = min(int(round((lat - min_lat) / resolution)), rows - 1)
+        col = min(int(round((lon - min_lon) / resolution)), cols - 1)
+        return row, col
+
+    def _cell_prediction(self, row, col):
+        classes = self.meta['classes']
+        proba = np.asarray(self.proba[row, col], dtype=float)
+        probabilities = dict(zip(classes, proba))
+        risk_score = probabilities.get('HIGH', 0)
+        names = self.meta['feature_names']
+        explanations = [
+            explain_feature(names[idx], float(value))
+            for idx, value in zip(self.top_features[row, col], self.top_values[row, col])
+        ]
+        return {
+            'risk_label': classes[int(self.labels[row, col])],
+            'risk_score': risk_score,
+            'confidence': float(proba.max()),
+            'probabilities': probabilities,
+            'alert_needed': bool(risk_score > 0.7)
+        }, explanations
+
+    def lookup(self, lat, lon):
+        """Serve a predict_tourist_risk-shaped result from the nearest cell"""
+        if self.check_interval is not None and time.monotonic() - self._last_check >= self.check_interval:
+            self.check()
+        if self.stale:
+            return None
+
+        index = self.cell_index(lat, lon)
+        if index is None:
+            return None
+
+        prediction, explanations = self._cell(*index)
+        min_lat, _, min_lon, _ = self.meta['bbox']
+        resolution = self.meta['resolution']
+        return {
+            'prediction': dict(prediction, probabilities=dict(prediction['probabilities'])),
+            'explanations': list(explanations),
+            'location': {'lat': lat, 'lon': lon},
+            'cell': {'lat': min_lat + index[0] * resolution, 'lon': min_lon + index[1] * resolution}
+        }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Precompute the Assam risk tile grid")
+    parser.add_argument('--output', default="data/risk_grid")
+    parser.add_argument('--resolution', type=float, default=0.01)
+    parser.add_argument('--model', default=DEFAULT_MODEL_PATH)
+    parser.add_argument('--chunk-size', type=int, default=5000)
+    args = parser.parse_args()
+
+    build_risk_grid(args.output, resolution=args.resolution, model_path=args.model, chunk_size=args.chunk_size)
+    grid = RiskGrid(args.output)
+    print(grid.lookup(26.1445, 91.7362))
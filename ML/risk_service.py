@@ -0,0 +1,102 @@
+import os
+import threading
+import time
+from instrumentation import inc, status
+from train_model import DEFAULT_MODEL_PATH, ExplainableTouristRiskPredictor
+
+def artifact_signature(path):
+    """(mtime_ns, size) of a model artifact, used to detect replacements.
+    
+    For a split artifact directory this is the signature of its LATEST
+    pointer, which is replaced only once a new version is fully written.
+    """
+    if os.path.isdir(path):
+        latest = os.path.join(path, 'LATEST')
+        path = latest if os.path.exists(latest) else os.path.join(path, 'metadata.json')
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+class RiskPredictionService:
+    """Keeps a loaded predictor resident and hot-reloads it when the artifact changes"""
+
+    def __init__(self, model_path, check_interval=2.0, n_threads=None):
+        self.model_path = os.path.abspath(model_path)
+        self.check_interval = check_interval
+        self.n_threads = n_threads
+        self._predictor = None
+        self._signature = None
+        self._last_check = 0.0
+        self._reload_lock = threading.Lock()
+        self.reload()
+
+    def _artifact_signature(self):
+        return artifact_signature(self.model_path)
+
+    def _load_predictor(self):
+        predictor = ExplainableTouristRiskPredictor()
+        predictor.load_model(self.model_path)
+        if self.n_threads is not None:
+            predictor.set_threads(self.n_threads)
+        predictor.compile()
+        return predictor
+
+    def reload(self):
+        """Load the artifact into a fresh predictor and swap it in atomically"""
+        with self._reload_lock:
+            signature = self._artifact_signature()
+            predictor = self._load_predictor()
+            # Requests already holding the old predictor finish on it; new ones get this one
+            self._predictor = predictor
+            self._signature = signature
+            self._last_check = time.monotonic()
+        return predictor
+
+    def reload_if_changed(self):
+        """Reload when the artifact's mtime/size changed; never blocks on a reload in progress"""
+        if not self._reload_lock.acquire(blocking=False):
+            return False
+        try:
+            self._last_check = time.monotonic()
+            signature = self._artifact_signature()
+            if signature == self._signature:
+                return False
+            predictor = self._load_predictor()
+            # A writer still replacing the file leaves a different signature; pick it up next check
+            if self._artifact_signature() != signature:
+                return False
+            self._predictor = predictor
+            self._signature = signature
+            inc('model_reloads_total')
+            status(f"🔄 Model reloaded from: {self.model_path}")
+            return True
+        except Exception as e:
+            inc('model_reload_failures_total')
+            print(f"❌ Model reload failed, keeping current model: {e}")
+            return False
+        finally:
+            self._reload_lock.release()
+
+    def get_predictor(self):
+        """Return the resident predictor, checking for a newer artifact at most every check_interval seconds"""
+        if self.check_interval is not None and time.monotonic() - self._last_check >= self.check_interval:
+            self.reload_if_changed()
+        return self._predictor
+
+_services = {}
+_services_lock = threading.Lock()
+
+def get_service(model_path=DEFAULT_MODEL_PATH, check_interval=2.0, n_threads=None):
+    """Return the process-wide service for model_path, loading the model on first use.
+    
+    check_interval and n_threads (XGBoost threads per predict) only apply
+    when this call creates the service.
+    """
+    key = os.path.abspath(model_path)
+    service = _services.get(key)
+    if service is None:
+        with _services_lock:
+            service = _services.get(key)
+            if service is None:
+                service = RiskPredictionService(key, check_interval=check_interval, n_threads=n_threads)
+                _services[key] = service
+    return service
@@ -0,0 +1,260 @@
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+
+from db_connection import get_ml_features_batch, get_table_signature
+from features import RAW_FEATURE_NAMES, build_feature_matrix
+from geofence import haversine_m
+from instrumentation import status, timer
+from predict_risk import generate_explanations_batch
+from risk_service import get_service
+from train_model import DEFAULT_MODEL_PATH
+
+class FeatureCache:
+    """LRU cache of raw feature rows keyed by coordinates snapped to a quantum_deg grid.
+
+    Samples are scored at their snapped coordinate, so nearby samples (on the
+    same route or on overlapping routes) share one feature lookup. Rows expire
+    after ttl seconds, and if a signature callable is given (e.g.
+    get_table_signature) the whole cache is dropped once it changes, checked
+    at most every check_interval seconds.
+    """
+
+    def __init__(self, quantum_deg=0.0002, max_size=200_000, ttl=900.0, signature=None, check_interval=60.0):
+        self.quantum_deg = quantum_deg
+        self.max_size = max_size
+        self.ttl = ttl
+        self.signature = signature
+        self.check_interval = check_interval
+        self.hits = 0
+        self.misses = 0
+        self._rows = OrderedDict()
+        self._lock = threading.Lock()
+        self._check_lock = threading.Lock()
+        self._signature_value = None
+        self._last_check = None
+
+    def clear(self):
+        with self._lock:
+            self._rows.clear()
+
+    def check(self):
+        """Drop every row if the signature changed since the last check, or cannot be read"""
+        with self._check_lock:
+            self._last_check = time.monotonic()
+            try:
+                current = self.signature()
+            except Exception as e:
+                print(f"❌ Feature cache check failed, clearing the cache: {e}")
+                current = None
+            if current is None or current != self._signature_value:
+                self.clear()
+            self._signature_value = current
+
+    def snap(self, lats, lons):
+        """(keys, snapped lats, snapped lons) for coordinate arrays"""
+        rows = np.round(np.asarray(lats, dtype=float) / self.quantum_deg).astype(np.int64)
+        cols = np.round(np.asarray(lons, dtype=float) / self.quantum_deg).astype(np.int64)
+        return list(zip(rows.tolist(), cols.tolist())), rows * self.quantum_deg, cols * self.quantum_deg
+
+    def get_many(self, lats, lons, feature_source, stats=None):
+        """Raw feature frame for the snapped points, fetching only the missing ones in one feature_source call.
+
+        hits and misses count sample positions; if a stats dict is given,
+        this call's hits, misses and fetched (unique points looked up) are
+        added to it.
+        """
+        if self.signature is not None and (self._last_check is None or
+                                           time.monotonic() - self._last_check >= self.check_interval):
+            self.check()
+        keys, snapped_lats, snapped_lons = self.snap(lats, lons)
+        values = np.empty((len(keys), len(RAW_FEATURE_NAMES)))
+
+        missing = {}
+        now = time.monotonic()
+        with self._lock:
+            for i, key in enumerate(keys):
+                entry = self._rows.get(key)
+                if entry is not None and self.ttl is not None and now - entry[0] > self.ttl:
+                    del self._rows[key]
+                    entry = None
+                if entry is None:
+                    missing.setdefault(key, []).append(i)
+                else:
+                    self._rows.move_to_end(key)
+                    values[i] = entry[1]
+            misses = sum(len(positions) for positions in missing.values())
+            self.hits += len(keys) - misses
+            self.misses += misses
+        if stats is not None:
+            stats['cache_hits'] += len(keys) - misses
+            stats['cache_misses'] += misses
+            stats['fetched'] += len(missing)
+
+        if missing:
+            first = [positions[0] for positions in missing.values()]
+            fetched = feature_source(snapped_lats[first], snapped_lons[first])
+            if fetched is None:
+                raise RuntimeError(f"Feature extraction failed for {len(first)} route samples")
+            fetched = fetched[RAW_FEATURE_NAMES].to_numpy(dtype=float)
+            stored_at = time.monotonic()
+            with self._lock:
+                for (key, positions), row in zip(missing.items(), fetched):
+                    values[positions] = row
+                    self._rows[key] = (stored_at, row)
+                while len(self._rows) > self.max_size:
+                    self._rows.popitem(last=False)
+
+        features = pd.DataFrame(values, columns=RAW_FEATURE_NAMES)
+        features.insert(0, 'lon', snapped_lons)
+        features.insert(0, 'lat', snapped_lats)
+        return features
+
+# Shared by score_route calls reading features from the database
+_default_cache = FeatureCache(signature=get_table_signature)
+
+def _cumulative_distance(lats, lons):
+    steps = haversine_m(lats[:-1], lons[:-1], lats[1:], lons[1:])
+    return np.concatenate([[0.0], np.cumsum(steps)])
+
+def _hotspots(samples, threshold):
+    """Contiguous stretches of samples whose risk_score exceeds threshold"""
+    above = samples['risk_score'].to_numpy() > threshold
+    edges = np.flatnonzero(np.diff(np.concatenate([[0], above.astype(np.int8), [0]])))
+    stretches = []
+    for start, stop in zip(edges[::2], edges[1::2]):
+        stretch = samples.iloc[start:stop]
+        peak = stretch['risk_score'].idxmax()
+        stretches.append({
+            'start_m': float(stretch['distance_m'].iloc[0]),
+            'end_m': float(stretch['distance_m'].iloc[-1]),
+            'peak_risk_score': float(samples.at[peak, 'risk_score']),
+            'peak_index': int(peak),
+            'lat': float(samples.at[peak, 'lat']),
+            'lon': float(samples.at[peak, 'lon']),
+            'explanations': []
+        })
+    return stretches
+
+def score_route(coords, coarse_spacing_m=1000.0, min_spacing_m=50.0, prob_threshold=0.15,
+                hotspot_threshold=0.7, model_path=DEFAULT_MODEL_PATH, feature_source=get_ml_features_batch,
+                cache=None, explain_hotspots=True):
+    """Risk profile along a polyline of (lat, lon) vertices.
+
+    The route is sampled every coarse_spacing_m first. Wherever two
+    consecutive samples disagree in label, or in any class probability by
+    more than prob_threshold, the gap is halved, down to min_spacing_m. Each
+    refinement round fetches features for all new samples through the cache
+    in one feature_source call and scores them in one batch.
+
+    Returns the samples, the per-segment profile, the maximum risk and the
+    hotspots (stretches above hotspot_threshold, explained at their peak).
+    Without a cache, database lookups share one process-wide FeatureCache;
+    any other feature_source gets a cache for this call only.
+    """
+    started = time.perf_counter()
+    if cache is None:
+        cache = _default_cache if feature_source is get_ml_features_batch else FeatureCache()
+    vertices = np.asarray(coords, dtype=float).reshape(-1, 2)
+    if len(vertices) < 2:
+        raise ValueError("A route needs at least two coordinates")
+    cumulative = _cumulative_distance(vertices[:, 0], vertices[:, 1])
+    length = float(cumulative[-1])
+
+    predictor = get_service(model_path).get_predictor()
+    classes = list(predictor.label_encoder.classes_)
+    cache_stats = {'cache_hits': 0, 'cache_misses': 0, 'fetched': 0}
+    prob_columns = [f'prob_{label}' for label in classes]
+
+    def score(distances):
+        lats = np.interp(distances, cumulative, vertices[:, 0])
+        lons = np.interp(distances, cumulative, vertices[:, 1])
+        with timer('route_features'):
+            raw = cache.get_many(lats, lons, feature_source, stats=cache_stats)
+        features = build_feature_matrix(raw)
+        scored = predictor.predict_batch_features(features)
+        scored.insert(0, 'lon', raw['lon'].to_numpy())
+        scored.insert(0, 'lat', raw['lat'].to_numpy())
+        scored.insert(0, 'distance_m', distances)
+        return scored, features
+
+    n_coarse = max(1, int(np.ceil(length / coarse_spacing_m)))
+    samples, features = score(np.linspace(0.0, length, n_coarse + 1))
+    rounds = 1
+    while True:
+        distances = samples['distance_m'].to_numpy()
+        gaps = np.diff(distances)
+        proba = samples[prob_columns].to_numpy()
+        labels = samples['risk_label'].to_numpy()
+        differs = (labels[1:] != labels[:-1]) | (np.abs(np.diff(proba, axis=0)).max(axis=1) > prob_threshold)
+        split = differs & (gaps >= 2 * min_spacing_m)
+        if not split.any():
+            break
+
+        new_samples, new_features = score(distances[:-1][split] + gaps[split] / 2)
+        samples = pd.concat([samples, new_samples], ignore_index=True)
+        features = np.vstack([features, new_features])
+        order = np.argsort(samples['distance_m'].to_numpy(), kind='stable')
+        samples = samples.iloc[order].reset_index(drop=True)
+        features = features[order]
+        rounds += 1
+
+    severity = {'HIGH': 2, 'MEDIUM': 1, 'LOW': 0}
+    sample_severity = samples['risk_label'].map(severity).fillna(0).to_numpy()
+    worse_end = np.where(sample_severity[1:] >= sample_severity[:-1],
+                         np.arange(1, len(samples)), np.arange(len(samples) - 1))
+    segments = pd.DataFrame({
+        'start_m': samples['distance_m'].to_numpy()[:-1],
+        'end_m': samples['distance_m'].to_numpy()[1:],
+        'risk_label': samples['risk_label'].to_numpy()[worse_end],
+        'risk_score': np.maximum(samples['risk_score'].to_numpy()[:-1], samples['risk_score'].to_numpy()[1:])
+    })
+
+    peak = int(samples['risk_score'].idxmax())
+    hotspots = _hotspots(samples, hotspot_threshold)
+    if explain_hotspots and hotspots:
+        peaks = [hotspot['peak_index'] for hotspot in hotspots]
+        contributions = predictor.explain_batch(features[peaks])
+        for hotspot, explanations in zip(hotspots, generate_explanations_batch(
+                features[peaks], contributions, predictor.feature_names)):
+            hotspot['explanations'] = explanations
+
+    elapsed = time.perf_counter() - started
+    status(f"🧭 Scored {length / 1000:.1f} km route: {len(samples)} samples in {rounds} round(s), "
+           f"{len(hotspots)} hotspot(s), {elapsed * 1000:.0f}ms")
+    return {
+        'length_m': length,
+        'samples': samples,
+        'segments': segments,
+        'max_risk': {
+            'risk_score': float(samples.at[peak, 'risk_score']),
+            'risk_label': samples.at[peak, 'risk_label'],
+            'distance_m': float(samples.at[peak, 'distance_m']),
+            'lat': float(samples.at[peak, 'lat']),
+            'lon': float(samples.at[peak, 'lon'])
+        },
+        'hotspots': hotspots,
+        'stats': {'samples': len(samples), 'rounds': rounds, **cache_stats, 'elapsed_s': elapsed}
+    }
+
+if __name__ == "__main__":
+    from benchmark import make_fixtures
+    from spatial_index import SpatialFeatureEngine
+
+    # A ~100 km trek through the synthetic fixture towns, scored against the in-process spatial index
+    hazard_zones, pois, centres = make_fixtures()
+    engine = SpatialFeatureEngine.from_records(hazard_zones, pois)
+    start_lat, start_lon = centres[0]
+    route = [(start_lat + 0.1 * np.sin(t / 3), start_lon + 0.09 * t) for t in range(11)]
+    # Cleared whenever the engine swaps in a new snapshot
+    cache = FeatureCache(signature=lambda: engine.snapshot, check_interval=0.0)
+
+    for attempt in ('cold', 'warm'):
+        result = score_route(route, feature_source=engine.get_ml_features_batch, cache=cache)
+        print(f"⏱️  {attempt}: {result['stats']}")
+    print(f"🚨 Max risk: {result['max_risk']}")
+    for hotspot in result['hotspots']:
+        print(f"  🔥 {hotspot['start_m']:.0f}-{hotspot['end_m']:.0f}m peak {hotspot['peak_risk_score']:.2f}: "
+              f"{hotspot['explanations'][:2]}")
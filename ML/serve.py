@@ -0,0 +1,240 @@
+import argparse
+import gc
+import json
+import os
+import shutil
+import signal
+import socket
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+import numpy as np
+from threadpoolctl import threadpool_limits
+
+import db_connection
+from db_connection import get_ml_features
+from features import RAW_FEATURE_NAMES
+from instrumentation import InMemorySink, get_metrics, inc, set_verbose, timer
+from predict_risk import score_features
+from risk_service import get_service
+from train_model import DEFAULT_MODEL_PATH
+
+# Seconds between a worker's metric flushes; /metrics may lag other workers by this much
+METRICS_FLUSH_INTERVAL = 1.0
+
+def _write_metrics(metrics_dir, name):
+    path = os.path.join(metrics_dir, f"{name}.json")
+    try:
+        with open(f"{path}.tmp", 'w') as f:
+            json.dump(get_metrics().dump_state(), f)
+        os.replace(f"{path}.tmp", path)
+    except OSError:
+        # The parent removes the directory at shutdown, possibly before a worker's last flush
+        pass
+
+def _flush_metrics_loop(metrics_dir, stop):
+    name = f"worker-{os.getpid()}"
+    while not stop.wait(METRICS_FLUSH_INTERVAL):
+        _write_metrics(metrics_dir, name)
+
+def aggregate_metrics(metrics_dir):
+    """Prometheus text for this worker's live metrics plus every other file in metrics_dir.
+
+    Files of dead workers are kept, so counters never go backwards when a
+    worker is replaced.
+    """
+    merged = InMemorySink()
+    merged.merge_state(get_metrics().dump_state())
+    own = f"worker-{os.getpid()}.json"
+    for name in os.listdir(metrics_dir):
+        if not name.endswith('.json') or name == own:
+            continue
+        try:
+            with open(os.path.join(metrics_dir, name)) as f:
+                merged.merge_state(json.load(f))
+        except (OSError, ValueError):
+            continue
+    return merged.render_prometheus()
+
+def _json_default(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    raise TypeError(f"Not JSON serializable: {type(value).__name__}")
+
+class RiskRequestHandler(BaseHTTPRequestHandler):
+    """POST /predict {lat, lon[, explain]}, POST /score {lat, lon, features[, explain]}, GET /health, GET /metrics
+
+    /score takes the 12 raw features directly and skips the database, which
+    keeps load tests about the serving path itself. /metrics covers every
+    worker when metrics_dir is set (serve() sets it), otherwise this process.
+    """
+
+    # One request per connection, so queued clients are spread over workers by accept()
+    protocol_version = 'HTTP/1.0'
+    feature_source = staticmethod(get_ml_features)
+    model_path = DEFAULT_MODEL_PATH
+    metrics_dir = None
+
+    def _send(self, code, body, content_type='application/json'):
+        if not isinstance(body, bytes):
+            body = json.dumps(body, default=_json_default).encode()
+        self.send_response(code)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == '/health':
+            self._send(200, {'status': 'ok', 'pid': os.getpid()})
+        elif self.path == '/metrics':
+            if self.metrics_dir:
+                body = aggregate_metrics(self.metrics_dir)
+            else:
+                body = get_metrics().render_prometheus()
+            self._send(200, body.encode(), 'text/plain; version=0.0.4')
+        else:
+            self._send(404, {'error': 'not found'})
+
+    def do_POST(self):
+        if self.path not in ('/predict', '/score'):
+            self._send(404, {'error': 'not found'})
+            return
+        try:
+            request = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+            lat, lon = float(request['lat']), float(request['lon'])
+            explain = request.get('explain')
+            if self.path == '/score':
+                features = request.get('features')
+                if not isinstance(features, dict):
+                    raise ValueError("/score needs a 'features' object")
+                missing = [name for name in RAW_FEATURE_NAMES if name not in features]
+                if missing:
+                    raise ValueError(f"missing features: {', '.join(missing)}")
+        except (ValueError, KeyError, TypeError) as e:
+            self._send(400, {'error': f"invalid request: {e}"})
+            return
+
+        with timer('request', endpoint=self.path):
+            if self.path == '/score':
+                hazard_features, poi_features = request.get('features'), {}
+            else:
+                hazard_features, poi_features = self.feature_source(lat, lon)
+            if hazard_features is None or poi_features is None:
+                inc('request_errors_total', endpoint=self.path)
+                self._send(503, {'error': 'feature extraction failed'})
+                return
+            try:
+                predictor = get_service(self.model_path).get_predictor()
+                result = score_features(predictor, lat, lon, hazard_features, poi_features, explain=explain)
+            except Exception as e:
+                inc('request_errors_total', endpoint=self.path)
+                self._send(500, {'error': str(e)})
+                return
+            self._send(200, result)
+
+    def log_message(self, format, *args):
+        pass
+
+def _serve_worker(listener, threads_per_worker, metrics_dir):
+    # The parent's pool sockets (if any) must not be shared; this worker opens its own on first use
+    db_connection.discard_connection_pool()
+    # The parent's load and warm-up metrics are published once, in parent.json
+    get_metrics().reset()
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    stop = threading.Event()
+    threading.Thread(target=_flush_metrics_loop, args=(metrics_dir, stop), daemon=True).start()
+    try:
+        with threadpool_limits(limits=threads_per_worker):
+            server = HTTPServer(listener.getsockname(), RiskRequestHandler, bind_and_activate=False)
+            server.socket.close()
+            server.socket = listener
+            server.serve_forever()
+    finally:
+        stop.set()
+        _write_metrics(metrics_dir, f"worker-{os.getpid()}")
+
+def serve(host='127.0.0.1', port=8000, workers=None, threads_per_worker=1, model_path=DEFAULT_MODEL_PATH,
+          explain_warmup=False):
+    """Load the model once, then pre-fork `workers` processes that share it copy-on-write.
+
+    Every worker handles one request at a time with threads_per_worker
+    XGBoost/BLAS threads, so workers x threads_per_worker should not exceed
+    the core count. Workers that die are replaced. Each worker flushes its
+    metrics to a shared temporary directory every METRICS_FLUSH_INTERVAL
+    seconds, and /metrics merges them.
+    """
+    workers = workers or os.cpu_count() or 1
+    set_verbose(False)
+
+    started = time.perf_counter()
+    RiskRequestHandler.model_path = model_path
+    predictor = get_service(model_path, n_threads=threads_per_worker).get_predictor()
+    # Warm the lazily built pieces so workers inherit them instead of building private copies
+    predictor.predict_proba_features(np.zeros((1, len(predictor.feature_names))))
+    if explain_warmup:
+        predictor.explain_batch(np.zeros((1, len(predictor.feature_names))))
+    # Objects allocated so far are never collected; keeping the GC off them keeps their pages shared
+    gc.collect()
+    gc.freeze()
+
+    metrics_dir = tempfile.mkdtemp(prefix='risk-serve-metrics-')
+    RiskRequestHandler.metrics_dir = metrics_dir
+    _write_metrics(metrics_dir, 'parent')
+
+    listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    listener.bind((host, port))
+    listener.listen(1024)
+    print(f"🚀 Model loaded in {time.perf_counter() - started:.2f}s; serving on http://{host}:{port} "
+          f"with {workers} worker(s) x {threads_per_worker} thread(s)")
+
+    children = set()
+
+    def spawn():
+        pid = os.fork()
+        if pid == 0:
+            try:
+                _serve_worker(listener, threads_per_worker, metrics_dir)
+            finally:
+                os._exit(0)
+        children.add(pid)
+
+    def shutdown(*_):
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        shutil.rmtree(metrics_dir, ignore_errors=True)
+        raise SystemExit(0)
+
+    for _ in range(workers):
+        spawn()
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
+
+    while True:
+        pid, _ = os.wait()
+        if pid in children:
+            children.discard(pid)
+            print(f"⚠️  Worker {pid} exited, starting a replacement")
+            spawn()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pre-forked risk prediction HTTP server")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument('--threads-per-worker', type=int, default=1)
+    parser.add_argument('--model', default=DEFAULT_MODEL_PATH)
+    parser.add_argument('--explain-warmup', action='store_true', help="Build the SHAP explainer before forking")
+    args = parser.parse_args()
+
+    serve(host=args.host, port=args.port, workers=args.workers, threads_per_worker=args.threads_per_worker,
+          model_path=args.model, explain_warmup=args.explain_warmup)
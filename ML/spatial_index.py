@@ -0,0 +1,198 @@
+import threading
+import numpy as np
+import pandas as pd
+import shapely
+from shapely import STRtree
+
+from db_connection import get_db_connection, get_ml_features, build_feature_dicts
+from features import RAW_FEATURE_NAMES
+from instrumentation import status, timer
+
+# Spherical Web Mercator (EPSG:3857), the projection hazard_zone_ml and pois are stored in
+EARTH_RADIUS_M = 6378137.0
+
+def to_web_mercator(lat, lon):
+    """Project WGS84 lat/lon (scalars or arrays) to EPSG:3857 x/y"""
+    x = np.radians(lon) * EARTH_RADIUS_M
+    y = np.log(np.tan(np.pi / 4 + np.radians(lat) / 2)) * EARTH_RADIUS_M
+    return x, y
+
+def _as_float(values):
+    return np.array([np.nan if v is None else float(v) for v in values], dtype=float)
+
+class FeatureSnapshot:
+    """Immutable in-memory copy of hazard_zone_ml and pois with STRtree indexes"""
+
+    def __init__(self, hazard_zones, pois):
+        self.hazard_geoms = np.array([h['geometry'] for h in hazard_zones], dtype=object)
+        self.danger_weight = _as_float(h.get('danger_weight') for h in hazard_zones)
+        self.is_industrial = np.array([h.get('zone_type') == 'industrial' for h in hazard_zones], dtype=bool)
+        self.is_military = np.array([h.get('military') is not None for h in hazard_zones], dtype=bool)
+        self.is_water = np.array([
+            h.get('natural') == 'water' or h.get('landuse') == 'reservoir' for h in hazard_zones
+        ], dtype=bool)
+        self.hazard_tree = STRtree(self.hazard_geoms)
+
+        self.poi_geoms = np.array([p['geometry'] for p in pois], dtype=object)
+        self.safety_weight = _as_float(p.get('safety_weight') for p in pois)
+        self.poi_tree = STRtree(self.poi_geoms)
+
+        hospitals = np.array([p.get('amenity') == 'hospital' for p in pois], dtype=bool)
+        self.hospital_geoms = self.poi_geoms[hospitals]
+        self.hospital_weight = self.safety_weight[hospitals]
+        self.hospital_tree = STRtree(self.hospital_geoms)
+
+    def hazard_rows(self, point):
+        """Compute the rows the hazard SQL queries would return for a projected point"""
+        if len(self.hazard_geoms) == 0:
+            return (None, None), (0, 0, 0, 0, None)
+
+        nearest, distance = self.hazard_tree.query_nearest(point, return_distance=True)
+        weight = self.danger_weight[nearest[0]]
+        hazard_basic = (distance[0], None if np.isnan(weight) else weight)
+
+        near = self.hazard_tree.query(point, predicate='dwithin', distance=1000)
+        near_500 = near[shapely.distance(self.hazard_geoms[near], point) <= 500]
+        weights = self.danger_weight[near]
+        hazard_counts = (
+            int(np.sum(weights > 0.7)),
+            int(np.sum(self.is_industrial[near])),
+            int(np.sum(self.is_military[near])),
+            int(np.sum(self.is_water[near_500])),
+            float(np.nansum(weights)),
+        )
+        return hazard_basic, hazard_counts
+
+    def poi_rows(self, point):
+        """Compute the rows the hospital/POI SQL queries would return for a projected point"""
+        if len(self.hospital_geoms) == 0:
+            hospital_basic = (None, None)
+            hospitals_2km = 0
+        else:
+            nearest, distance = self.hospital_tree.query_nearest(point, return_distance=True)
+            weight = self.hospital_weight[nearest[0]]
+            hospital_basic = (distance[0], None if np.isnan(weight) else weight)
+            hospitals_2km = len(self.hospital_tree.query(point, predicate='dwithin', distance=2000))
+
+        near = self.poi_tree.query(point, predicate='dwithin', distance=1000)
+        poi_counts = (hospitals_2km, float(np.nansum(self.safety_weight[near])))
+        return hospital_basic, poi_counts
+
+def load_snapshot_from_db():
+    """Read hazard zones and POIs (EPSG:3857 geometries) from PostGIS"""
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT ST_AsBinary(geometry), danger_weight, zone_type, military, "natural", landuse
+            FROM hazard_zone_ml
+            WHERE geometry IS NOT NULL
+        """)
+        hazard_zones = [
+            {
+                'geometry': shapely.from_wkb(bytes(row[0])),
+                'danger_weight': row[1],
+                'zone_type': row[2],
+                'military': row[3],
+                'natural': row[4],
+                'landuse': row[5]
+            }
+            for row in cursor.fetchall()
+        ]
+
+        cursor.execute("""
+            SELECT ST_AsBinary(geometry), amenity, safety_weight
+            FROM pois
+            WHERE geometry IS NOT NULL
+        """)
+        pois = [
+            {'geometry': shapely.from_wkb(bytes(row[0])), 'amenity': row[1], 'safety_weight': row[2]}
+            for row in cursor.fetchall()
+        ]
+
+    return FeatureSnapshot(hazard_zones, pois)
+
+class SpatialFeatureEngine:
+    """Drop-in replacement for get_ml_features backed by an in-memory spatial index"""
+
+    def __init__(self, loader=load_snapshot_from_db, refresh_interval=None):
+        self._loader = loader
+        self._snapshot = None
+        self._refresh_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._refresh_thread = None
+        self.refresh_interval = refresh_interval
+
+        self.refresh()
+        if refresh_interval:
+            self._refresh_thread = threading.Thread(target=self._refresh_loop, daemon=True)
+            self._refresh_thread.start()
+
+    @classmethod
+    def from_records(cls, hazard_zones, pois, **kwargs):
+        """Build an engine from in-memory records instead of the database"""
+        return cls(loader=lambda: FeatureSnapshot(hazard_zones, pois), **kwargs)
+
+    @property
+    def snapshot(self):
+        return self._snapshot
+
+    def refresh(self):
+        """Reload the snapshot and swap it in once it is fully built"""
+        with self._refresh_lock:
+            snapshot = self._loader()
+            self._snapshot = snapshot
+        status(f"🗺️  Spatial snapshot loaded: {len(snapshot.hazard_geoms)} hazard zones, "
+              f"{len(snapshot.poi_geoms)} POIs")
+        return snapshot
+
+    def _refresh_loop(self):
+        while not self._stop.wait(self.refresh_interval):
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"❌ Spatial snapshot refresh failed, keeping previous snapshot: {e}")
+
+    def close(self):
+        """Stop the background refresh timer"""
+        self._stop.set()
+        if self._refresh_thread is not None:
+            self._refresh_thread.join()
+            self._refresh_thread = None
+
+    def get_ml_features(self, lat, lon):
+        """Same contract as db_connection.get_ml_features, without a database round trip"""
+        snapshot = self._snapshot
+        x, y = to_web_mercator(lat, lon)
+        point = shapely.Point(x, y)
+
+        with timer('index_hazards'):
+            hazard_basic, hazard_counts = snapshot.hazard_rows(point)
+        with timer('index_pois'):
+            hospital_basic, poi_counts = snapshot.poi_rows(point)
+
+        with timer('feature_dicts'):
+            return build_feature_dicts(lat, lon, hazard_basic, hazard_counts, hospital_basic, poi_counts)
+
+    def get_ml_features_batch(self, lats, lons):
+        """Same contract as db_connection.get_ml_features_batch: a frame of lat, lon and RAW_FEATURE_NAMES"""
+        rows = []
+        for lat, lon in zip(lats, lons):
+            hazard_features, poi_features = self.get_ml_features(lat, lon)
+            rows.append({'lat': lat, 'lon': lon, **hazard_features, **poi_features})
+        return pd.DataFrame(rows, columns=['lat', 'lon'] + RAW_FEATURE_NAMES)
+
+def compare_with_sql(engine, points, tolerance=1e-6):
+    """Return (lat, lon, feature, engine_value, sql_value) for every mismatch against the SQL path"""
+    mismatches = []
+    for lat, lon in points:
+        expected = get_ml_features(lat, lon)
+        actual = engine.get_ml_features(lat, lon)
+        if expected[0] is None:
+            raise RuntimeError(f"SQL feature extraction failed for ({lat}, {lon})")
+
+        for expected_dict, actual_dict in zip(expected, actual):
+            for name, sql_value in expected_dict.items():
+                value = actual_dict[name]
+                if not np.isclose(value, sql_value, rtol=tolerance, atol=tolerance):
+                    mismatches.append((lat, lon, name, value, sql_value))
+    return mismatches
@@ -0,0 +1,10 @@
+-- Indexes behind the feature queries in db_connection.py.
+-- GiST indexes serve both the KNN (<->) nearest lookups and the ST_DWithin radius filters.
+CREATE INDEX IF NOT EXISTS hazard_zone_ml_geometry_gist ON hazard_zone_ml USING gist (geometry);
+CREATE INDEX IF NOT EXISTS pois_geometry_gist ON pois USING gist (geometry);
+
+-- Nearest-hospital KNN walks only hospitals instead of filtering every POI
+CREATE INDEX IF NOT EXISTS pois_hospital_geometry_gist ON pois USING gist (geometry) WHERE amenity = 'hospital';
+
+ANALYZE hazard_zone_ml;
+ANALYZE pois;
@@ -0,0 +1,181 @@
+import asyncio
+import math
+import os
+import time
+from collections import namedtuple
+
+from db_connection import get_ml_features
+from geofence import haversine_m
+from predict_risk import score_features
+from risk_service import get_service
+from train_model import DEFAULT_MODEL_PATH
+
+Ping = namedtuple('Ping', ['tourist_id', 'timestamp', 'lat', 'lon'])
+
+# kind is 'raised' when alert_needed turns on and 'cleared' when it turns off
+AlertEvent = namedtuple('AlertEvent', ['kind', 'tourist_id', 'timestamp', 'lat', 'lon', 'result'])
+
+class TouristState:
+    """Last evaluated position and result for one tourist"""
+
+    __slots__ = ('lat', 'lon', 'cell', 'result', 'alert', 'last_seen')
+
+    def __init__(self, lat, lon, cell, result, last_seen):
+        self.lat = lat
+        self.lon = lon
+        self.cell = cell
+        self.result = result
+        self.alert = False
+        self.last_seen = last_seen
+
+class TrajectoryRiskMonitor:
+    """Incremental risk monitor over a stream of (tourist_id, timestamp, lat, lon) pings.
+
+    Features and risk are recomputed only when a tourist has moved at least
+    move_threshold_m since the last evaluation or has crossed into another
+    grid cell; otherwise the previous result is reused. An AlertEvent is
+    emitted whenever a tourist's alert_needed flips.
+    """
+
+    def __init__(self, feature_source=get_ml_features, model_path=DEFAULT_MODEL_PATH,
+                 move_threshold_m=100.0, cell_size_deg=0.01, explain=None):
+        self.feature_source = feature_source
+        self.model_path = model_path
+        self.move_threshold_m = move_threshold_m
+        self.cell_size_deg = cell_size_deg
+        self.explain = explain
+        self.states = {}
+        self.stats = {'pings': 0, 'evaluations': 0, 'reused': 0, 'failures': 0, 'alerts': 0}
+
+    def _cell(self, lat, lon):
+        return math.floor(lat / self.cell_size_deg), math.floor(lon / self.cell_size_deg)
+
+    def _needs_evaluation(self, state, lat, lon, cell):
+        if state is None or state.result is None or cell != state.cell:
+            return True
+        return haversine_m(state.lat, state.lon, lat, lon) >= self.move_threshold_m
+
+    def _score(self, lat, lon):
+        hazard_features, poi_features = self.feature_source(lat, lon)
+        if hazard_features is None or poi_features is None:
+            return None
+        predictor = get_service(self.model_path).get_predictor()
+        return score_features(predictor, lat, lon, hazard_features, poi_features, explain=self.explain)
+
+    def process(self, ping):
+        """Consume one ping; returns the AlertEvent it triggered, or None"""
+        ping = Ping(*ping)
+        self.stats['pings'] += 1
+        state = self.states.get(ping.tourist_id)
+        cell = self._cell(ping.lat, ping.lon)
+
+        if not self._needs_evaluation(state, ping.lat, ping.lon, cell):
+            self.stats['reused'] += 1
+            state.last_seen = ping.timestamp
+            return None
+
+        result = self._score(ping.lat, ping.lon)
+        if result is None:
+            # Keep the previous result and retry on the next ping
+            self.stats['failures'] += 1
+            if state is not None:
+                state.last_seen = ping.timestamp
+            return None
+
+        self.stats['evaluations'] += 1
+        if state is None:
+            state = self.states[ping.tourist_id] = TouristState(ping.lat, ping.lon, cell, result, ping.timestamp)
+        else:
+            state.lat, state.lon, state.cell, state.result, state.last_seen = (
+                ping.lat, ping.lon, cell, result, ping.timestamp
+            )
+
+        alert = result['prediction']['alert_needed']
+        if alert == state.alert:
+            return None
+        state.alert = alert
+        self.stats['alerts'] += 1
+        return AlertEvent('raised' if alert else 'cleared', ping.tourist_id, ping.timestamp,
+                          ping.lat, ping.lon, result)
+
+    def current(self, tourist_id):
+        """Latest result for a tourist, or None if it has not been evaluated yet"""
+        state = self.states.get(tourist_id)
+        return state.result if state else None
+
+    def evict_idle(self, now, max_idle):
+        """Forget tourists whose last ping is older than now - max_idle"""
+        idle = [tourist_id for tourist_id, state in self.states.items() if now - state.last_seen > max_idle]
+        for tourist_id in idle:
+            del self.states[tourist_id]
+        return len(idle)
+
+    def run(self, pings):
+        """Consume an iterable of pings, yielding AlertEvents as they occur"""
+        for ping in pings:
+            event = self.process(ping)
+            if event is not None:
+                yield event
+
+    async def run_async(self, queue, executor=None):
+        """Consume pings from an asyncio.Queue until a None sentinel, yielding AlertEvents.
+
+        Scoring blocks on the database and the model, so each ping is processed
+        in an executor to keep the event loop free.
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            ping = await queue.get()
+            try:
+                if ping is None:
+                    return
+                event = await loop.run_in_executor(executor, self.process, ping)
+                if event is not None:
+                    yield event
+            finally:
+                queue.task_done()
+
+def tail_pings(path, poll_interval=1.0, follow=True):
+    """Yield Pings from a CSV file of tourist_id,timestamp,lat,lon lines, following appended lines"""
+    with open(path) as f:
+        while True:
+            position = f.tell()
+            line = f.readline()
+            if not line or not line.endswith('\n'):
+                if not follow:
+                    return
+                # Partial line: rewind and wait for the writer to finish it
+                f.seek(position)
+                time.sleep(poll_interval)
+                continue
+
+            fields = line.strip().split(',')
+            if len(fields) != 4 or fields[0] == 'tourist_id':
+                continue
+            tourist_id, timestamp, lat, lon = fields
+            try:
+                yield Ping(tourist_id, float(timestamp), float(lat), float(lon))
+            except ValueError:
+                print(f"⚠️  Skipping malformed ping: {line.strip()}")
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Stream tourist pings and emit risk alert events")
+    parser.add_argument('pings', help="CSV file of tourist_id,timestamp,lat,lon lines")
+    parser.add_argument('--no-follow', action='store_true', help="Stop at end of file instead of tailing it")
+    parser.add_argument('--move-threshold', type=float, default=100.0, help="Metres moved before re-evaluating")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.pings):
+        raise FileNotFoundError(f"Ping file not found: {args.pings}")
+
+    monitor = TrajectoryRiskMonitor(move_threshold_m=args.move_threshold)
+    try:
+        for event in monitor.run(tail_pings(args.pings, follow=not args.no_follow)):
+            icon = "🚨" if event.kind == 'raised' else "✅"
+            print(f"{icon} {event.tourist_id} alert {event.kind} at ({event.lat}, {event.lon}): "
+                  f"{event.result['prediction']['risk_label']}")
+    except KeyboardInterrupt:
+        pass
+    print(f"📊 {monitor.stats}")
@@ -0,0 +1,41 @@
+import os
+import sys
+import psycopg2
+import pytest
+
+# The ML modules use flat imports and expect to run from the ML directory
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import db_connection
+from benchmark import load_fixtures_into_db, make_fixtures, quiet
+
+@pytest.fixture(scope='session')
+def fixture_db():
+    """The benchmark fixtures loaded into the throwaway PostGIS database named by ML_TEST_DB_NAME.
+
+    load_fixtures_into_db drops hazard_zone_ml and pois, so the tests never
+    run against the configured DB_NAME; they are skipped when ML_TEST_DB_NAME
+    is unset or the database cannot be reached, unless ML_TEST_REQUIRE_DB is
+    set (as in CI), which turns an unreachable database into a failure.
+    """
+    database = os.environ.get('ML_TEST_DB_NAME')
+    if not database:
+        pytest.skip("Set ML_TEST_DB_NAME to a throwaway PostGIS database to run the database tests")
+
+    db_connection.close_connection_pool()
+    db_connection.DB_CONFIG['database'] = database
+    try:
+        with quiet(), db_connection.get_db_connection() as conn:
+            conn.cursor().execute("SELECT PostGIS_Version()")
+    except psycopg2.Error as e:
+        db_connection.close_connection_pool()
+        message = f"PostGIS database {database!r} is not reachable: {e}"
+        if os.environ.get('ML_TEST_REQUIRE_DB'):
+            pytest.fail(message)
+        pytest.skip(message)
+
+    hazard_zones, pois, centres = make_fixtures(n_hazards=500, n_pois=800, n_clusters=5)
+    with quiet():
+        load_fixtures_into_db(hazard_zones, pois)
+    yield hazard_zones, pois, centres
+    db_connection.close_connection_pool()
@@ -0,0 +1,27 @@
+import asyncio
+import numpy as np
+
+import async_predict
+from benchmark import sample_points
+from db_connection import get_ml_features
+
+def test_async_features_match_prepared_statement(fixture_db):
+    _, _, centres = fixture_db
+    lats, lons = sample_points(centres, 50)
+
+    async def fetch_all():
+        try:
+            return await asyncio.gather(*(async_predict.get_ml_features(lat, lon) for lat, lon in zip(lats, lons)))
+        finally:
+            await async_predict.close_async_pool()
+
+    results = asyncio.run(fetch_all())
+
+    for lat, lon, (hazard_async, poi_async) in zip(lats, lons, results):
+        assert hazard_async is not None, (lat, lon)
+        hazard_features, poi_features = get_ml_features(lat, lon)
+        expected = {**hazard_features, **poi_features}
+        actual = {**hazard_async, **poi_async}
+        assert actual.keys() == expected.keys()
+        for name, value in expected.items():
+            assert np.isclose(actual[name], value), (lat, lon, name)
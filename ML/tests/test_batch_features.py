@@ -0,0 +1,29 @@
+import numpy as np
+
+from benchmark import sample_points
+from db_connection import get_ml_features_batch
+from features import RAW_FEATURE_NAMES
+from spatial_index import SpatialFeatureEngine
+
+def test_batch_query_matches_spatial_index(fixture_db):
+    hazard_zones, pois, centres = fixture_db
+    engine = SpatialFeatureEngine.from_records(hazard_zones, pois)
+    lats, lons = sample_points(centres, 300, seed=11)
+
+    actual = get_ml_features_batch(lats, lons)
+    expected = engine.get_ml_features_batch(lats, lons)
+
+    assert actual is not None
+    assert list(actual.columns) == list(expected.columns)
+    np.testing.assert_allclose(actual[RAW_FEATURE_NAMES].to_numpy(float),
+                               expected[RAW_FEATURE_NAMES].to_numpy(float), rtol=1e-6, atol=1e-6)
+
+def test_batch_query_keeps_input_order(fixture_db):
+    _, _, centres = fixture_db
+    lats, lons = sample_points(centres, 50, seed=12)
+
+    forward = get_ml_features_batch(lats, lons)
+    backward = get_ml_features_batch(lats[::-1], lons[::-1])
+
+    np.testing.assert_allclose(forward[RAW_FEATURE_NAMES].to_numpy(float),
+                               backward[RAW_FEATURE_NAMES].to_numpy(float)[::-1])
@@ -0,0 +1,42 @@
+import os
+import numpy as np
+import pandas as pd
+import pytest
+
+from fast_inference import CompiledEnsemble, check_parity
+from features import FEATURE_NAMES
+from train_model import ExplainableTouristRiskPredictor
+
+ML_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODEL_PATH = os.path.join(ML_DIR, 'models', 'tourist_risk_model')
+
+@pytest.fixture(scope='module')
+def predictor():
+    predictor = ExplainableTouristRiskPredictor()
+    predictor.load_model(MODEL_PATH)
+    return predictor
+
+@pytest.fixture(scope='module')
+def features():
+    return pd.read_csv(os.path.join(ML_DIR, 'data', 'ML_training_data.csv'))[FEATURE_NAMES].to_numpy(dtype=float)
+
+def test_compiled_ensemble_matches_voting_classifier(predictor, features):
+    max_diff, agreement = check_parity(predictor, features, CompiledEnsemble.from_predictor(predictor))
+
+    assert max_diff < 1e-5
+    assert agreement == 1.0
+
+@pytest.mark.parametrize('compiled', [True, False], ids=['compiled', 'native'])
+def test_predict_features_matches_batch_path(predictor, features, compiled):
+    predictor.compiled_model = CompiledEnsemble.from_predictor(predictor) if compiled else None
+
+    for row in features[::25]:
+        row = row[None, :]
+        expected = predictor.prediction_dict(predictor.predict_batch_features(row))
+        actual = predictor.predict_features(row)
+
+        assert actual['risk_label'] == expected['risk_label']
+        assert actual['alert_needed'] == expected['alert_needed']
+        assert actual['risk_score'] == pytest.approx(expected['risk_score'], abs=1e-12)
+        assert actual['confidence'] == pytest.approx(expected['confidence'], abs=1e-12)
+        assert actual['probabilities'] == pytest.approx(expected['probabilities'], abs=1e-12)
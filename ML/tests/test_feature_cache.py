@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+
+from features import RAW_FEATURE_NAMES
+from route_risk import FeatureCache
+
+class CountingSource:
+    """Feature source returning a constant row per point and counting the points looked up"""
+
+    def __init__(self):
+        self.fetched = 0
+        self.value = 1.0
+
+    def __call__(self, lats, lons):
+        self.fetched += len(lats)
+        return pd.DataFrame(np.full((len(lats), len(RAW_FEATURE_NAMES)), self.value), columns=RAW_FEATURE_NAMES)
+
+LATS = np.array([26.1, 26.2, 26.3])
+LONS = np.array([91.7, 91.8, 91.9])
+
+def test_rows_expire_after_ttl():
+    source = CountingSource()
+    cache = FeatureCache(ttl=0.0)
+    cache.get_many(LATS, LONS, source)
+    cache.get_many(LATS, LONS, source)
+
+    assert source.fetched == 6
+
+def test_signature_change_clears_cache():
+    source = CountingSource()
+    version = [1]
+    cache = FeatureCache(signature=lambda: version[0], check_interval=0.0)
+    cache.get_many(LATS, LONS, source)
+    cache.get_many(LATS, LONS, source)
+    assert source.fetched == 3
+
+    version[0] = 2
+    source.value = 2.0
+    features = cache.get_many(LATS, LONS, source)
+
+    assert source.fetched == 6
+    assert (features[RAW_FEATURE_NAMES].to_numpy() == 2.0).all()
+
+def test_unreadable_signature_clears_cache():
+    source = CountingSource()
+
+    def signature():
+        raise RuntimeError("database is down")
+
+    cache = FeatureCache(signature=signature, check_interval=0.0)
+    cache.get_many(LATS, LONS, source)
+    cache.get_many(LATS, LONS, source)
+
+    assert source.fetched == 6
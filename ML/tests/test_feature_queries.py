@@ -0,0 +1,20 @@
+import numpy as np
+
+from benchmark import sample_points
+from db_connection import check_query_plan, get_ml_features, get_ml_features_batch
+
+def test_feature_plan_uses_knn_index_scans(fixture_db):
+    _, _, centres = fixture_db
+    lat, lon = centres[0]
+
+    assert check_query_plan(lat, lon) == []
+
+def test_prepared_statement_matches_batch_query(fixture_db):
+    _, _, centres = fixture_db
+    lats, lons = sample_points(centres, 50)
+    batch = get_ml_features_batch(lats, lons)
+
+    for i, (lat, lon) in enumerate(zip(lats, lons)):
+        hazard_features, poi_features = get_ml_features(lat, lon)
+        for name, value in {**hazard_features, **poi_features}.items():
+            assert np.isclose(value, batch.at[i, name]), (lat, lon, name)
@@ -0,0 +1,21 @@
+import numpy as np
+import shapely
+
+from benchmark import sample_points
+from spatial_index import EARTH_RADIUS_M, SpatialFeatureEngine, compare_with_sql
+
+def _to_lat_lon(x, y):
+    return np.degrees(2 * np.arctan(np.exp(y / EARTH_RADIUS_M)) - np.pi / 2), np.degrees(x / EARTH_RADIUS_M)
+
+def test_spatial_index_matches_postgis(fixture_db):
+    hazard_zones, pois, centres = fixture_db
+    engine = SpatialFeatureEngine.from_records(hazard_zones, pois)
+    lats, lons = sample_points(centres, 200)
+
+    # Points inside hazard polygons (distance 0) and on hospitals, where the fallbacks are easiest to get wrong
+    hazard_centres = shapely.centroid([h['geometry'] for h in hazard_zones[:25]])
+    hospitals = [p['geometry'] for p in pois if p['amenity'] == 'hospital'][:25]
+    edge_lats, edge_lons = _to_lat_lon(*shapely.get_coordinates(list(hazard_centres) + hospitals).T)
+    points = list(zip(np.concatenate([lats, edge_lats]), np.concatenate([lons, edge_lons])))
+
+    assert compare_with_sql(engine, points) == []
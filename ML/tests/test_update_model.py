@@ -0,0 +1,68 @@
+import os
+import numpy as np
+import pandas as pd
+import pytest
+
+from train_model import ExplainableTouristRiskPredictor
+
+ML_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODEL_PATH = os.path.join(ML_DIR, 'models', 'tourist_risk_model')
+TRAINING_CSV = os.path.join(ML_DIR, 'data', 'ML_training_data.csv')
+
+def _delta_csv(tmp_path, n=300):
+    # A small delta with labels the shipped model disagrees with, so boosting has gradient to follow
+    rows = pd.read_csv(TRAINING_CSV).sample(n, random_state=1)
+    rows['risk_label'] = np.random.default_rng(0).choice(['HIGH', 'LOW', 'MEDIUM'], n)
+    path = tmp_path / 'delta.csv'
+    rows.to_csv(path, index=False)
+    return str(path)
+
+def _probabilities(predictor, features):
+    return predictor.ensemble_model.predict_proba(predictor.scaler.transform(np.asarray(features, dtype=float)))
+
+def test_update_changes_predictions(tmp_path):
+    predictor = ExplainableTouristRiskPredictor()
+    predictor.load_model(MODEL_PATH)
+    csv_path = _delta_csv(tmp_path)
+    X, _ = predictor.load_training_data(csv_path, use_cache=False)
+    before = _probabilities(predictor, X)
+
+    result = predictor.update_model(csv_path, reference_csv=TRAINING_CSV, n_new_trees=20, tolerance=np.inf)
+
+    assert result['changed'] and result['accepted']
+    assert np.abs(_probabilities(predictor, X) - before).max() > 1e-6
+
+def test_update_without_splits_is_not_saved(tmp_path):
+    predictor = ExplainableTouristRiskPredictor()
+    predictor.load_model(MODEL_PATH)
+    output_path = str(tmp_path / 'model')
+
+    # The training min_child_weight is too high for a 300-row delta, so every new tree is a stump of zeros
+    result = predictor.update_model(_delta_csv(tmp_path), reference_csv=TRAINING_CSV, n_new_trees=20,
+                                    tolerance=np.inf, output_path=output_path, tree_params={'min_child_weight': 3})
+
+    assert not result['changed'] and not result['accepted']
+    assert result['max_probability_change'] == 0.0
+    assert not os.path.exists(output_path)
+
+def test_update_that_forgets_the_training_data_is_rejected(tmp_path):
+    predictor = ExplainableTouristRiskPredictor()
+    predictor.load_model(MODEL_PATH)
+    before = predictor.ensemble_model
+    output_path = str(tmp_path / 'model')
+
+    # Random labels improve the metrics on a holdout split of the delta itself, but wreck the original test split
+    result = predictor.update_model(_delta_csv(tmp_path), reference_csv=TRAINING_CSV, output_path=output_path)
+
+    assert result['changed'] and not result['accepted']
+    assert result['after']['holdout']['accuracy'] > result['before']['holdout']['accuracy']
+    assert result['after']['reference']['accuracy'] < result['before']['reference']['accuracy']
+    assert predictor.ensemble_model is before
+    assert not os.path.exists(output_path)
+
+def test_update_requires_data_beyond_the_delta(tmp_path):
+    predictor = ExplainableTouristRiskPredictor()
+    predictor.load_model(MODEL_PATH)
+
+    with pytest.raises(ValueError, match='reference_csv or holdout_csv'):
+        predictor.update_model(_delta_csv(tmp_path))
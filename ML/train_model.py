@@ -3,39 +3,233 @@ import numpy as np
 import xgboost as xgb
 from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import StandardScaler, LabelEncoder
-from sklearn.metrics import accuracy_score, classification_report, roc_auc_score
+from sklearn.metrics import accuracy_score, classification_report, log_loss, roc_auc_score
 from sklearn.ensemble import VotingClassifier
-import shap
+from sklearn.utils import Bunch
 import joblib
 import warnings
+import json
 import os
+import shutil
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from features import FEATURE_DTYPES, FEATURE_NAMES, build_feature_matrix, build_feature_vector
+from fast_inference import CompiledEnsemble
+from instrumentation import inc, status, timer
 
 warnings.filterwarnings('ignore')
 
+# The compiled ensemble wins on small requests; XGBoost's native predictor is faster on large batches
+COMPILED_MAX_ROWS = 64
+
+# Explanations are cached per exact feature vector; popular locations repeat often
+EXPLANATION_CACHE_SIZE = 4096
+
+def mean_abs_contributions(shap_values, n_rows, n_features):
+    """Normalize shap_values output to an (n_rows, n_features) array of mean |SHAP| over classes"""
+    if isinstance(shap_values, list):
+        # Older SHAP: one (n, features) array per class
+        return np.mean(np.abs(np.stack(shap_values)), axis=0)
+    
+    shap_values = np.abs(np.asarray(shap_values))
+    if shap_values.ndim == 3:
+        # Newer SHAP returns (n, features, classes); older multi-output arrays are (classes, n, features)
+        if shap_values.shape[:2] == (n_rows, n_features):
+            return shap_values.mean(axis=2)
+        return shap_values.mean(axis=0)
+    return shap_values.reshape(n_rows, -1)
+
+XGB_PARAMS = {
+    'n_estimators': 200,
+    'max_depth': 4,
+    'learning_rate': 0.1,
+    'subsample': 0.9,
+    'colsample_bytree': 0.9,
+    'reg_alpha': 0.1,
+    'reg_lambda': 1.0,
+    'min_child_weight': 3,
+    'objective': 'multi:softprob',
+    'eval_metric': 'mlogloss',
+    'random_state': 42,
+    'n_jobs': -1,
+    'tree_method': 'hist'
+}
+
+ENSEMBLE_SEEDS = [42, 123, 456]
+
+def prefit_voting_ensemble(estimators, y):
+    """Soft VotingClassifier around already-fitted members, without refitting them"""
+    ensemble = VotingClassifier(estimators=estimators, voting='soft')
+    ensemble.estimators_ = [model for _, model in estimators]
+    ensemble.named_estimators_ = Bunch(**dict(estimators))
+    ensemble.le_ = LabelEncoder().fit(y)
+    ensemble.classes_ = ensemble.le_.classes_
+    return ensemble
+
+def _trim_to_best_iteration(model):
+    """Drop the rounds boosted past the early-stopping best iteration"""
+    best_iteration = model.best_iteration
+    model._Booster = model.get_booster()[:best_iteration + 1]
+    model.set_params(n_estimators=best_iteration + 1, early_stopping_rounds=None)
+
+# Minimum leaf weight of trees added by update_model, as a share of the delta's total hessian (the
+# trained members are confident, so a fixed min_child_weight of 3 would stop any split on a small delta),
+# and the floor below which a delta is too small or too certain to grow any tree
+UPDATE_LEAF_SHARE = 0.05
+UPDATE_MIN_CHILD_WEIGHT_FLOOR = 0.1
+
+# Largest per-row probability change below which an update counts as a no-op
+MIN_PREDICTION_CHANGE = 1e-9
+
+def continue_boosting(model, X, y, n_new_trees, random_state, tree_params=None):
+    """Copy of a fitted XGBClassifier boosted for n_new_trees more rounds on (X, y)"""
+    params = {**XGB_PARAMS, 'random_state': random_state, **(tree_params or {})}
+    params = xgb.XGBClassifier(**params).get_xgb_params()
+    # xgb.train rather than fit(): a small delta may not contain every class, which fit() rejects
+    params['num_class'] = model.n_classes_
+    booster = xgb.train(params, xgb.DMatrix(X, label=y), num_boost_round=n_new_trees,
+                        xgb_model=model.get_booster().copy())
+    updated = xgb.XGBClassifier()
+    updated.load_model(bytearray(booster.save_raw('ubj')))
+    return updated
+
+def update_min_child_weight(model, X):
+    """min_child_weight making every new leaf cover UPDATE_LEAF_SHARE of the hessian of model on X"""
+    proba = model.predict_proba(X)
+    # multi:softprob hessian per row and class, averaged over the per-class trees
+    hessian = 2 * proba * (1 - proba)
+    return max(UPDATE_MIN_CHILD_WEIGHT_FLOOR, UPDATE_LEAF_SHARE * float(hessian.sum(axis=0).mean()))
+
+def split_test_rows(X, y_encoded):
+    """The stratified (X_train, X_test, y_train, y_test) split train_explainable_model evaluates on"""
+    return train_test_split(X, y_encoded, test_size=0.2, random_state=42, stratify=y_encoded)
+
+def holdout_metrics(model, X, y):
+    """Accuracy and multi-class log loss of model on scaled holdout rows"""
+    proba = model.predict_proba(X)
+    return {
+        'accuracy': float(accuracy_score(y, np.argmax(proba, axis=1))),
+        'log_loss': float(log_loss(y, proba, labels=np.arange(proba.shape[1])))
+    }
+
+TRAINING_CACHE_VERSION = 1
+
+MODEL_FORMAT_VERSION = 1
+DEFAULT_MODEL_PATH = "models/tourist_risk_model"
+
+def _tree_explainer(model):
+    """SHAP TreeExplainer for a booster; shap is only imported once explanations are needed"""
+    import shap
+    return shap.TreeExplainer(model)
+
+def _check_feature_names(feature_names, source):
+    if list(feature_names) != FEATURE_NAMES:
+        raise ValueError(f"Model at {source} expects features {list(feature_names)}, "
+                         f"but serving builds {FEATURE_NAMES}")
+
+def resolve_model_version(path):
+    """Version directory of a split artifact: path itself, or the one its LATEST file names"""
+    if os.path.exists(os.path.join(path, 'metadata.json')):
+        return path
+    with open(os.path.join(path, 'LATEST')) as f:
+        return os.path.join(path, f.read().strip())
+
+def _training_cache_dir(csv_path):
+    directory, name = os.path.split(os.path.abspath(csv_path))
+    return os.path.join(directory, '.cache', name)
+
+def _csv_signature(csv_path):
+    stat = os.stat(csv_path)
+    return [stat.st_size, stat.st_mtime_ns]
+
+def load_training_cache(csv_path, feature_names):
+    """Typed training frame from the .npy cache, or None if it is missing or out of date"""
+    cache_dir = _training_cache_dir(csv_path)
+    try:
+        with open(os.path.join(cache_dir, 'meta.json')) as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if (meta.get('version') != TRAINING_CACHE_VERSION or meta.get('source') != _csv_signature(csv_path)
+            or meta.get('feature_names') != list(feature_names)):
+        return None
+    
+    features = np.load(os.path.join(cache_dir, 'features.npy'), mmap_mode='r')
+    codes = np.load(os.path.join(cache_dir, 'labels.npy'))
+    df = pd.DataFrame({name: features[name] for name in feature_names})
+    df['risk_label'] = pd.Categorical.from_codes(codes, categories=meta['classes'])
+    return df
+
+def save_training_cache(csv_path, df, feature_names):
+    """Write the typed training frame as a structured features.npy plus label codes"""
+    cache_dir = _training_cache_dir(csv_path)
+    os.makedirs(cache_dir, exist_ok=True)
+    
+    features = np.empty(len(df), dtype=[(name, FEATURE_DTYPES[name]) for name in feature_names])
+    for name in feature_names:
+        features[name] = df[name].to_numpy()
+    labels = df['risk_label'].astype('category')
+    np.save(os.path.join(cache_dir, 'features.npy'), features)
+    np.save(os.path.join(cache_dir, 'labels.npy'), labels.cat.codes.to_numpy())
+    
+    # meta.json is written last and marks the cache valid for this exact CSV
+    with open(os.path.join(cache_dir, 'meta.json'), 'w') as f:
+        json.dump({
+            'version': TRAINING_CACHE_VERSION,
+            'source': _csv_signature(csv_path),
+            'feature_names': list(feature_names),
+            'classes': [str(label) for label in labels.cat.categories]
+        }, f)
+
 class ExplainableTouristRiskPredictor:
     def __init__(self):
         self.xgb_model = None
         self.ensemble_model = None
         self.scaler = StandardScaler()
         self.label_encoder = LabelEncoder()
-        self.shap_explainer = None
-        self.feature_names = [
-            'dist_nearest_hazard_m', 'nearest_hazard_weight', 
-            'dist_nearest_hospital_m', 'nearest_hospital_weight',
-            'high_danger_zones_1km', 'hospitals_within_2km',
-            'industrial_hazards_1km', 'military_zones_1km', 'water_hazards_500m',
-            'weighted_hazard_score_1km', 'weighted_safety_score_1km',
-            'inside_assam_boundary', 'hazard_to_safety_ratio', 'hospital_accessibility', 
-            'hazard_proximity', 'safety_density', 'boundary_penalty', 
-            'critical_hazard_exposure', 'emergency_response_score'
-        ]
+        self._shap_explainer = None
+        self.compiled_model = None
+        self._explanation_cache = OrderedDict()
+        self._explanation_lock = threading.Lock()
+        self.feature_names = list(FEATURE_NAMES)
+        self.stage_timings = OrderedDict()
+    
+    @property
+    def shap_explainer(self):
+        """TreeExplainer for xgb_model, built on first use"""
+        if self._shap_explainer is None and self.xgb_model is not None:
+            with self._explanation_lock:
+                if self._shap_explainer is None:
+                    with timer('shap_setup'):
+                        self._shap_explainer = _tree_explainer(self.xgb_model)
+        return self._shap_explainer
+    
+    @shap_explainer.setter
+    def shap_explainer(self, explainer):
+        self._shap_explainer = explainer
     
-    def load_training_data(self, csv_path):
-        """Load and prepare training data from CSV"""
+    def load_training_data(self, csv_path, use_cache=True):
+        """Load and prepare training data from CSV
+        
+        Only the feature and label columns are parsed, with explicit dtypes.
+        The parsed arrays are cached as .npy files next to the CSV and reused
+        until the CSV's size or mtime changes.
+        """
         if not os.path.exists(csv_path):
             raise FileNotFoundError(f"Training data file not found: {csv_path}")
-            
-        df = pd.read_csv(csv_path)
+        
+        df = load_training_cache(csv_path, self.feature_names) if use_cache else None
+        if df is None:
+            df = pd.read_csv(
+                csv_path,
+                usecols=self.feature_names + ['risk_label'],
+                dtype={**{name: FEATURE_DTYPES[name] for name in self.feature_names}, 'risk_label': 'category'}
+            )
+            if use_cache:
+                save_training_cache(csv_path, df, self.feature_names)
         print(f"✅ Loaded {len(df)} training samples")
         
         # Prepare features and target
@@ -47,67 +241,199 @@ class ExplainableTouristRiskPredictor:
         
         return X, y
     
-    def train_explainable_model(self, csv_path):
-        """Train XGBoost with SHAP explainability"""
+    def train_explainable_model(self, csv_path, n_workers=1, threads_per_worker=None,
+                                early_stopping_rounds=None, validation_size=0.1):
+        """Train XGBoost with SHAP explainability
+        
+        The ensemble members are fitted once (optionally n_workers at a time,
+        each with threads_per_worker XGBoost threads) and wrapped in a prefit
+        VotingClassifier; the first member doubles as the SHAP model. With
+        early_stopping_rounds, validation_size of the training split is held
+        out for early stopping and each member is trimmed to its best round.
+        Per-stage wall-clock times are recorded in self.stage_timings.
+        """
+        self.stage_timings = OrderedDict()
         print("🚀 Starting model training...")
-        X, y = self.load_training_data(csv_path)
+        with self._stage('load_data'):
+            X, y = self.load_training_data(csv_path)
         
-        # Encode labels
-        y_encoded = self.label_encoder.fit_transform(y)
+        with self._stage('preprocess'):
+            # Encode labels
+            y_encoded = self.label_encoder.fit_transform(y)
+            
+            # Split data with stratification
+            X_train, X_test, y_train, y_test = split_test_rows(X, y_encoded)
+            
+            X_val = y_val = None
+            if early_stopping_rounds:
+                X_train, X_val, y_train, y_val = train_test_split(
+                    X_train, y_train, test_size=validation_size, random_state=42, stratify=y_train
+                )
+            
+            # Scale features
+            X_train_scaled = self.scaler.fit_transform(X_train)
+            X_test_scaled = self.scaler.transform(X_test)
+            X_val_scaled = self.scaler.transform(X_val) if early_stopping_rounds else None
         
-        # Split data with stratification
-        X_train, X_test, y_train, y_test = train_test_split(
-            X, y_encoded, test_size=0.2, random_state=42, stratify=y_encoded
-        )
+        if threads_per_worker is None:
+            threads_per_worker = -1 if n_workers == 1 else max(1, (os.cpu_count() or 1) // n_workers)
+        xgb_params = {**XGB_PARAMS, 'n_jobs': threads_per_worker}
+        if early_stopping_rounds:
+            xgb_params['early_stopping_rounds'] = early_stopping_rounds
         
-        # Scale features
-        X_train_scaled = self.scaler.fit_transform(X_train)
-        X_test_scaled = self.scaler.transform(X_test)
-        
-        # XGBoost parameters
-        xgb_params = {
-            'n_estimators': 200,
-            'max_depth': 4,
-            'learning_rate': 0.1,
-            'subsample': 0.9,
-            'colsample_bytree': 0.9,
-            'reg_alpha': 0.1,
-            'reg_lambda': 1.0,
-            'min_child_weight': 3,
-            'objective': 'multi:softprob',
-            'eval_metric': 'mlogloss',
-            'random_state': 42,
-            'n_jobs': -1,
-            'tree_method': 'hist'
-        }
-        
-        # Train main XGBoost model
-        print("⏳ Training XGBoost model...")
-        self.xgb_model = xgb.XGBClassifier(**xgb_params)
-        self.xgb_model.fit(X_train_scaled, y_train, verbose=False)
+        def fit_member(random_state):
+            model = xgb.XGBClassifier(**{**xgb_params, 'random_state': random_state})
+            if early_stopping_rounds:
+                model.fit(X_train_scaled, y_train, eval_set=[(X_val_scaled, y_val)], verbose=False)
+                _trim_to_best_iteration(model)
+            else:
+                model.fit(X_train_scaled, y_train, verbose=False)
+            return model
         
         # Create ensemble for better accuracy
-        print("⏳ Training ensemble models...")
-        ensemble_models = []
-        for i, random_state in enumerate([42, 123, 456]):
-            model_params = {**xgb_params, 'random_state': random_state}
-            model = xgb.XGBClassifier(**model_params)
-            model.fit(X_train_scaled, y_train, verbose=False)
-            ensemble_models.append((f'xgb_{i}', model))
+        print(f"⏳ Training {len(ENSEMBLE_SEEDS)} ensemble models "
+              f"({n_workers} worker(s) x {threads_per_worker} thread(s))...")
+        with self._stage('train_members'):
+            if n_workers > 1:
+                # XGBoost releases the GIL while boosting, so threads train members in parallel
+                with ThreadPoolExecutor(max_workers=n_workers) as pool:
+                    members = list(pool.map(fit_member, ENSEMBLE_SEEDS))
+            else:
+                members = [fit_member(random_state) for random_state in ENSEMBLE_SEEDS]
         
-        self.ensemble_model = VotingClassifier(estimators=ensemble_models, voting='soft')
-        self.ensemble_model.fit(X_train_scaled, y_train)
+        with self._stage('ensemble'):
+            # The standalone model used the same parameters and seed as the first member
+            self.xgb_model = members[0]
+            self.ensemble_model = prefit_voting_ensemble(
+                [(f'xgb_{i}', model) for i, model in enumerate(members)], y_train
+            )
         
         # Initialize SHAP explainer
         print("⏳ Setting up SHAP explainer...")
-        self.shap_explainer = shap.TreeExplainer(self.xgb_model)
+        with self._stage('shap_setup'):
+            self.shap_explainer = _tree_explainer(self.xgb_model)
         
         # Evaluate model
-        self.evaluate_model(X_test_scaled, y_test)
+        with self._stage('evaluate'):
+            self.evaluate_model(X_test_scaled, y_test)
         
         print("✅ Model training completed!")
         return self
     
+    def _encode_labels(self, y):
+        """Encode labels with the fitted label encoder, rejecting classes the model has never seen"""
+        y = y.astype(str)
+        unknown = sorted(set(y.unique()) - set(self.label_encoder.classes_))
+        if unknown:
+            raise ValueError(f"Labels {unknown} are not among the model's classes "
+                             f"{list(self.label_encoder.classes_)}; a full retrain is required")
+        return self.label_encoder.transform(y)
+    
+    def update_model(self, csv_path, reference_csv=None, holdout_csv=None, n_new_trees=50, holdout_size=0.2,
+                     tolerance=0.0, output_path=None, tree_params=None):
+        """Append n_new_trees to every ensemble member, boosting on the rows in csv_path only
+        
+        The loaded scaler and label encoder stay fixed, and tree_params
+        override XGB_PARAMS for the new trees (min_child_weight defaults to
+        update_min_child_weight). The updated ensemble is compared with the
+        current one on the test split of reference_csv, the CSV the model was
+        trained on, and on holdout_csv (or a holdout_size split of csv_path).
+        It replaces the current one - and is saved to output_path as a new
+        version - only if it changes some prediction and neither accuracy nor
+        log loss regresses by more than tolerance on any of them. Returns the
+        before/after metrics per holdout, the largest probability change and
+        whether it was accepted.
+        """
+        if self.ensemble_model is None:
+            raise ValueError("Load a trained model before updating it")
+        if reference_csv is None and holdout_csv is None:
+            raise ValueError("update_model needs reference_csv or holdout_csv: "
+                             "a holdout drawn from the new rows alone cannot show the update forgetting old data")
+        
+        print(f"🔁 Updating model with new rows from: {csv_path}")
+        X, y = self.load_training_data(csv_path, use_cache=False)
+        y_encoded = self._encode_labels(y)
+        holdouts = {}
+        if reference_csv:
+            X_reference, y_reference = self.load_training_data(reference_csv)
+            _, X_test, _, y_test = split_test_rows(X_reference, self._encode_labels(y_reference))
+            holdouts['reference'] = (self.scaler.transform(X_test), y_test)
+        if holdout_csv:
+            X_holdout, y_holdout = self.load_training_data(holdout_csv)
+            holdouts['holdout'] = (self.scaler.transform(X_holdout), self._encode_labels(y_holdout))
+            X_train, y_train = X, y_encoded
+        else:
+            counts = np.bincount(y_encoded)
+            stratify = y_encoded if counts[counts > 0].min() >= 2 else None
+            X_train, X_holdout, y_train, y_holdout = train_test_split(
+                X, y_encoded, test_size=holdout_size, random_state=42, stratify=stratify
+            )
+            holdouts['holdout'] = (self.scaler.transform(X_holdout), y_holdout)
+        X_train_scaled = self.scaler.transform(X_train)
+        
+        before = {name: holdout_metrics(self.ensemble_model, *rows) for name, rows in holdouts.items()}
+        
+        print(f"⏳ Boosting {n_new_trees} more rounds per member on {len(X_train)} rows...")
+        names = [name for name, _ in self.ensemble_model.estimators]
+        current = self.ensemble_model.estimators_
+        members = [
+            continue_boosting(model, X_train_scaled, y_train, n_new_trees, ENSEMBLE_SEEDS[i % len(ENSEMBLE_SEEDS)],
+                              tree_params={'min_child_weight': update_min_child_weight(model, X_train_scaled),
+                                           **(tree_params or {})})
+            for i, model in enumerate(current)
+        ]
+        candidate = prefit_voting_ensemble(list(zip(names, members)), np.arange(len(self.label_encoder.classes_)))
+        candidate.weights = self.ensemble_model.weights
+        after = {name: holdout_metrics(candidate, *rows) for name, rows in holdouts.items()}
+        
+        X_all = np.vstack([X_train_scaled] + [rows[0] for rows in holdouts.values()])
+        change = float(np.abs(candidate.predict_proba(X_all) - self.ensemble_model.predict_proba(X_all)).max())
+        changed = change > MIN_PREDICTION_CHANGE
+        regressed = [name for name in holdouts
+                     if after[name]['accuracy'] < before[name]['accuracy'] - tolerance
+                     or after[name]['log_loss'] > before[name]['log_loss'] + tolerance]
+        accepted = changed and not regressed
+        for name in holdouts:
+            print(f"🎯 {name.capitalize()} accuracy: {before[name]['accuracy']:.4f} -> {after[name]['accuracy']:.4f}, "
+                  f"log loss: {before[name]['log_loss']:.4f} -> {after[name]['log_loss']:.4f}")
+        print(f"🔀 Largest probability change: {change:.6f}")
+        
+        if not changed:
+            print("⚠️  Update changed no predictions (the new trees did not split); "
+                  "keeping the current model and saving nothing - try a lower min_child_weight")
+        elif accepted:
+            # Keep explaining with the member that explained before (the first one for trained models)
+            explainer_index = next((i for i, model in enumerate(current) if model is self.xgb_model), 0)
+            self.ensemble_model = candidate
+            self.xgb_model = members[explainer_index]
+            self.shap_explainer = None
+            self.compiled_model = None
+            self._explanation_cache.clear()
+            print("✅ Update accepted")
+            if output_path:
+                self.save_model(output_path)
+        else:
+            print(f"❌ Update rejected: {' and '.join(regressed)} metrics regressed, keeping the current model")
+        
+        return {'before': before, 'after': after, 'accepted': accepted, 'changed': changed,
+                'max_probability_change': change, 'rows': len(X_train), 'new_trees': n_new_trees}
+    
+    @contextmanager
+    def _stage(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stage_timings[name] = time.perf_counter() - started
+    
+    def print_stage_timings(self):
+        """Print the wall-clock breakdown of the last training run"""
+        total = sum(self.stage_timings.values())
+        print(f"\n⏱️  Training time breakdown ({total:.2f}s total):")
+        for name, seconds in self.stage_timings.items():
+            share = seconds / total if total else 0
+            print(f"  {name:<15} {seconds:8.2f}s  {share:6.1%}")
+    
     def evaluate_model(self, X_test, y_test):
         """Comprehensive model evaluation"""
         print("\n" + "="*50)
@@ -141,62 +467,131 @@ class ExplainableTouristRiskPredictor:
         """Predict risk with detailed SHAP explanations"""
         
         # Create feature vector matching training data
-        features = np.array([
-            hazard_features['dist_nearest_hazard_m'],
-            hazard_features['nearest_hazard_weight'],
-            poi_features['dist_nearest_hospital_m'],
-            poi_features['nearest_hospital_weight'],
-            hazard_features['high_danger_zones_1km'],
-            poi_features['hospitals_within_2km'],
-            hazard_features['industrial_hazards_1km'],
-            hazard_features['military_zones_1km'],
-            hazard_features['water_hazards_500m'],
-            hazard_features['weighted_hazard_score_1km'],
-            poi_features['weighted_safety_score_1km'],
-            int(hazard_features['inside_assam_boundary']),
-            # Computed features
-            hazard_features['weighted_hazard_score_1km'] / (poi_features['weighted_safety_score_1km'] + 0.001),
-            1 / (poi_features['dist_nearest_hospital_m'] + 1),
-            1 / (hazard_features['dist_nearest_hazard_m'] + 1),
-            poi_features['hospitals_within_2km'] / (hazard_features['high_danger_zones_1km'] + 1),
-            int(not hazard_features['inside_assam_boundary']),
-            hazard_features['military_zones_1km'] * 0.8 + hazard_features['industrial_hazards_1km'] * 0.6,
-            (poi_features['hospitals_within_2km'] * poi_features['nearest_hospital_weight']) / (poi_features['dist_nearest_hospital_m'] + 1)
-        ]).reshape(1, -1)
-        
-        # Scale features
-        features_scaled = self.scaler.transform(features)
-        
-        # Get predictions
-        risk_proba = self.ensemble_model.predict_proba(features_scaled)[0]
-        risk_label = self.label_encoder.inverse_transform(self.ensemble_model.predict(features_scaled))[0]
-        confidence = np.max(risk_proba)
-        
-        # SHAP explanations
-        shap_values = self.shap_explainer.shap_values(features_scaled[0])
-        
-        # Risk probabilities
-        risk_scores = dict(zip(self.label_encoder.classes_, risk_proba))
+        features = build_feature_vector(hazard_features, poi_features)
+        prediction = self.predict_features(features)
+        contributions = self.explain_batch(features)
         
         return {
-            'prediction': {
-                'risk_label': risk_label,
-                'risk_score': risk_scores.get('HIGH', 0),
-                'confidence': confidence,
-                'probabilities': risk_scores,
-                'alert_needed': risk_scores.get('HIGH', 0) > 0.7
-            },
-            'explanations': self._generate_explanations(features[0], shap_values),
+            'prediction': prediction,
+            'explanations': self._generate_explanations(features[0], contributions[0]),
             'location': {'lat': lat, 'lon': lon}
         }
     
-    def _generate_explanations(self, features, shap_values):
-        """Generate human-readable explanations"""
-        if len(shap_values.shape) > 1:
-            feature_contributions = np.mean(np.abs(shap_values), axis=0)
-        else:
-            feature_contributions = np.abs(shap_values)
+    def predict_batch(self, raw_features):
+        """Vectorized prediction for many rows of the 12 raw features"""
+        return self.predict_batch_features(build_feature_matrix(raw_features))
+    
+    def predict_batch_features(self, features):
+        """Scale, predict and decode labels for an (n, 19) feature matrix in one call"""
+        risk_proba = self.predict_proba_features(features)
+        classes = self.label_encoder.classes_
+        
+        result = pd.DataFrame({'risk_label': classes[np.argmax(risk_proba, axis=1)]})
+        for i, label in enumerate(classes):
+            result[f'prob_{label}'] = risk_proba[:, i]
+        result['risk_score'] = result['prob_HIGH'] if 'HIGH' in classes else 0.0
+        result['confidence'] = risk_proba.max(axis=1)
+        result['alert_needed'] = result['risk_score'] > 0.7
+        return result
+    
+    def predict_features(self, features):
+        """Single-prediction dict for a (1, 19) feature matrix; skips the DataFrame predict_batch_features builds"""
+        proba = self.predict_proba_features(features)[0]
+        classes = self.label_encoder.classes_
+        best = int(np.argmax(proba))
+        risk_score = float(proba[np.flatnonzero(classes == 'HIGH')[0]]) if 'HIGH' in classes else 0.0
+        return {
+            'risk_label': str(classes[best]),
+            'risk_score': risk_score,
+            'confidence': float(proba[best]),
+            'probabilities': {str(label): float(p) for label, p in zip(classes, proba)},
+            'alert_needed': risk_score > 0.7
+        }
+    
+    def predict_proba_features(self, features):
+        """Ensemble class probabilities for an unscaled (n, 19) feature matrix"""
+        inc('predicted_rows_total', len(features))
+        if self.compiled_model is not None and len(features) <= COMPILED_MAX_ROWS:
+            # The compiled trees have the scaler folded in, so there is no separate scaling stage
+            with timer('predict', path='compiled'):
+                return self.compiled_model.predict_proba(features)
+        with timer('scale'):
+            scaled = self.scaler.transform(features)
+        with timer('predict', path='native'):
+            return self.ensemble_model.predict_proba(scaled)
+    
+    def set_threads(self, n_threads):
+        """Pin the XGBoost thread count of every booster (the trained params default to all cores)"""
+        models = list(self.ensemble_model.estimators_)
+        if self.xgb_model is not None and all(self.xgb_model is not model for model in models):
+            models.append(self.xgb_model)
+        for model in models:
+            model.set_params(n_jobs=n_threads)
+            model.get_booster().set_param('nthread', n_threads)
+        return self
+    
+    def compile(self):
+        """Build the single-pass compiled ensemble used for small requests"""
+        self.compiled_model = CompiledEnsemble.from_predictor(self)
+        return self
+    
+    def explain_batch(self, features, cache=True):
+        """Mean |SHAP| contribution per feature for an unscaled (n, 19) matrix.
+        
+        Rows already in the cache are reused; the rest go through a single
+        shap_values call. Bulk jobs pass cache=False so their rows neither
+        pay for cache copies nor evict the serving hot set.
+        """
+        features = np.asarray(features, dtype=float)
+        if not cache:
+            return self._shap_contributions(features)
+        
+        keys = [row.tobytes() for row in features]
+        contributions = np.empty_like(features)
+        
+        missing = []
+        with self._explanation_lock:
+            for i, key in enumerate(keys):
+                cached = self._explanation_cache.get(key)
+                if cached is None:
+                    missing.append(i)
+                else:
+                    self._explanation_cache.move_to_end(key)
+                    contributions[i] = cached
+        
+        inc('explanation_cache_hits_total', len(keys) - len(missing))
+        if missing:
+            inc('explanation_cache_misses_total', len(missing))
+            contributions[missing] = self._shap_contributions(features[missing])
+            with self._explanation_lock:
+                for i in missing:
+                    self._explanation_cache[keys[i]] = contributions[i].copy()
+                while len(self._explanation_cache) > EXPLANATION_CACHE_SIZE:
+                    self._explanation_cache.popitem(last=False)
         
+        return contributions
+    
+    def _shap_contributions(self, features):
+        explainer = self.shap_explainer
+        with timer('scale'):
+            scaled = self.scaler.transform(features)
+        with timer('shap'):
+            shap_values = explainer.shap_values(scaled)
+        return mean_abs_contributions(shap_values, len(features), features.shape[1])
+    
+    def prediction_dict(self, batch, row=0):
+        """Convert one row of a predict_batch result into the single-prediction dict"""
+        record = batch.iloc[row]
+        return {
+            'risk_label': record['risk_label'],
+            'risk_score': record['risk_score'],
+            'confidence': record['confidence'],
+            'probabilities': {label: record[f'prob_{label}'] for label in self.label_encoder.classes_},
+            'alert_needed': bool(record['alert_needed'])
+        }
+    
+    def _generate_explanations(self, features, feature_contributions):
+        """Generate human-readable explanations"""
         # Get top contributing features
         top_indices = np.argsort(feature_contributions)[::-1][:5]
         explanations = []
@@ -221,7 +616,14 @@ class ExplainableTouristRiskPredictor:
         return explanations
     
     def save_model(self, filepath):
-        """Save trained model"""
+        """Save trained model as a new version of a split artifact, or as one joblib blob for a .joblib path"""
+        if filepath.endswith('.joblib'):
+            self._save_joblib(filepath)
+        else:
+            self._save_artifact(filepath)
+        print(f"💾 Model saved to: {filepath}")
+    
+    def _save_joblib(self, filepath):
         model_data = {
             'ensemble_model': self.ensemble_model,
             'xgb_model': self.xgb_model,
@@ -235,10 +637,63 @@ class ExplainableTouristRiskPredictor:
         os.makedirs(os.path.dirname(filepath), exist_ok=True)
         
         joblib.dump(model_data, filepath)
-        print(f"💾 Model saved to: {filepath}")
+    
+    def _save_artifact(self, root):
+        """Write root/vNNNN/ (native boosters, scaler arrays, metadata.json) and point root/LATEST at it"""
+        os.makedirs(root, exist_ok=True)
+        versions = [int(name[1:]) for name in os.listdir(root) if name[:1] == 'v' and name[1:].isdigit()]
+        version = f"v{max(versions, default=0) + 1:04d}"
+        staging_dir = os.path.join(root, f".{version}.tmp")
+        shutil.rmtree(staging_dir, ignore_errors=True)
+        os.makedirs(staging_dir)
+        
+        members = []
+        explainer_model = None
+        explainer_raw = self.xgb_model.get_booster().save_raw('ubj')
+        names = [name for name, _ in self.ensemble_model.estimators]
+        for name, model in zip(names, self.ensemble_model.estimators_):
+            model.save_model(os.path.join(staging_dir, f"{name}.ubj"))
+            members.append(f"{name}.ubj")
+            # Older artifacts hold the standalone model as a separate but identical copy of a member
+            if model is self.xgb_model or model.get_booster().save_raw('ubj') == explainer_raw:
+                explainer_model = explainer_model or f"{name}.ubj"
+        if explainer_model is None:
+            explainer_model = 'xgb_model.ubj'
+            self.xgb_model.save_model(os.path.join(staging_dir, explainer_model))
+        
+        np.savez(os.path.join(staging_dir, 'scaler.npz'), mean=self.scaler.mean_, scale=self.scaler.scale_,
+                 var=self.scaler.var_, n_samples_seen=self.scaler.n_samples_seen_)
+        with open(os.path.join(staging_dir, 'metadata.json'), 'w') as f:
+            json.dump({
+                'format_version': MODEL_FORMAT_VERSION,
+                'created_at': time.time(),
+                'xgboost_version': xgb.__version__,
+                'feature_names': list(self.feature_names),
+                'classes': [str(label) for label in self.label_encoder.classes_],
+                'members': members,
+                'weights': self.ensemble_model.weights,
+                'explainer_model': explainer_model
+            }, f, indent=2)
+        os.replace(staging_dir, os.path.join(root, version))
+        
+        latest = os.path.join(root, 'LATEST')
+        with open(f"{latest}.tmp", 'w') as f:
+            f.write(version + '\n')
+        os.replace(f"{latest}.tmp", latest)
     
     def load_model(self, filepath):
-        """Load trained model"""
+        """Load trained model from a split artifact directory or a legacy .joblib file"""
+        with timer('model_load'):
+            if os.path.isdir(filepath):
+                self._load_artifact(filepath)
+            else:
+                self._load_joblib(filepath)
+        _check_feature_names(self.feature_names, filepath)
+        self.compiled_model = None
+        self._explanation_cache.clear()
+        status(f"📥 Model loaded from: {filepath}")
+    
+    def _load_joblib(self, filepath):
         model_data = joblib.load(filepath)
         self.ensemble_model = model_data['ensemble_model']
         self.xgb_model = model_data['xgb_model']
@@ -246,17 +701,91 @@ class ExplainableTouristRiskPredictor:
         self.label_encoder = model_data['label_encoder']
         self.shap_explainer = model_data['shap_explainer']
         self.feature_names = model_data['feature_names']
-        print(f"📥 Model loaded from: {filepath}")
+    
+    def _load_artifact(self, root):
+        version_dir = resolve_model_version(root)
+        with open(os.path.join(version_dir, 'metadata.json')) as f:
+            metadata = json.load(f)
+        if metadata['format_version'] != MODEL_FORMAT_VERSION:
+            raise ValueError(f"Unsupported model format version {metadata['format_version']} in {version_dir}")
+        _check_feature_names(metadata['feature_names'], version_dir)
+        
+        def load_booster(filename):
+            model = xgb.XGBClassifier()
+            model.load_model(os.path.join(version_dir, filename))
+            return model
+        
+        members = {filename: load_booster(filename) for filename in metadata['members']}
+        self.ensemble_model = prefit_voting_ensemble(
+            [(os.path.splitext(filename)[0], model) for filename, model in members.items()],
+            np.arange(len(metadata['classes']))
+        )
+        self.ensemble_model.weights = metadata['weights']
+        explainer_model = metadata['explainer_model']
+        self.xgb_model = members.get(explainer_model) or load_booster(explainer_model)
+        
+        arrays = np.load(os.path.join(version_dir, 'scaler.npz'))
+        self.scaler = StandardScaler()
+        self.scaler.mean_ = arrays['mean']
+        self.scaler.scale_ = arrays['scale']
+        self.scaler.var_ = arrays['var']
+        self.scaler.n_samples_seen_ = arrays['n_samples_seen']
+        self.scaler.n_features_in_ = len(arrays['mean'])
+        
+        self.label_encoder = LabelEncoder()
+        self.label_encoder.classes_ = np.array(metadata['classes'], dtype=object)
+        self.feature_names = list(metadata['feature_names'])
+        # Rebuilt from xgb_model on the first explanation instead of being unpickled here
+        self.shap_explainer = None
 
 if __name__ == "__main__":
-    # Train the model
-    csv_path = "data/ML_training_data.csv"
-    model_path = "models/tourist_risk_model.joblib"
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Train the tourist risk model")
+    parser.add_argument('--csv', default="data/ML_training_data.csv")
+    parser.add_argument('--model', default=DEFAULT_MODEL_PATH,
+                        help="Artifact directory to add a version to, or a .joblib file")
+    parser.add_argument('--convert', default=None, metavar='ARTIFACT',
+                        help="Re-save an existing artifact to --model instead of training")
+    parser.add_argument('--workers', type=int, default=1, help="Ensemble members trained in parallel")
+    parser.add_argument('--threads-per-worker', type=int, default=None, help="XGBoost threads per member")
+    parser.add_argument('--early-stopping', type=int, default=None, help="Early stopping rounds on a validation split")
+    parser.add_argument('--timings', action='store_true', help="Print a wall-clock breakdown per stage")
+    parser.add_argument('--update', action='store_true',
+                        help="Boost the existing --model further on the rows in --csv instead of retraining")
+    parser.add_argument('--reference', default="data/ML_training_data.csv",
+                        help="CSV the model was trained on; --update must not regress on its test split")
+    parser.add_argument('--holdout', default=None, help="Holdout CSV for --update (default: split of --csv)")
+    parser.add_argument('--new-trees', type=int, default=50, help="Rounds appended per member by --update")
+    parser.add_argument('--tolerance', type=float, default=0.0, help="Allowed metric regression for --update")
+    parser.add_argument('--min-child-weight', type=float, default=None,
+                        help=f"min_child_weight of the trees added by --update (default: {UPDATE_LEAF_SHARE:.0%} "
+                             f"of the new rows' hessian, at least {UPDATE_MIN_CHILD_WEIGHT_FLOOR})")
+    args = parser.parse_args()
     
-    print("🚀 Starting Tourist Risk Model Training...")
     predictor = ExplainableTouristRiskPredictor()
-    predictor.train_explainable_model(csv_path)
-    predictor.save_model(model_path)
+    if args.convert:
+        predictor.load_model(args.convert)
+        predictor.save_model(args.model)
+        raise SystemExit(0)
+    
+    if args.update:
+        predictor.load_model(args.model)
+        tree_params = None
+        if args.min_child_weight is not None:
+            tree_params = {'min_child_weight': args.min_child_weight}
+        result = predictor.update_model(args.csv, reference_csv=args.reference, holdout_csv=args.holdout,
+                                        n_new_trees=args.new_trees, tolerance=args.tolerance,
+                                        output_path=args.model, tree_params=tree_params)
+        raise SystemExit(0 if result['accepted'] else 1)
+    
+    print("🚀 Starting Tourist Risk Model Training...")
+    predictor.train_explainable_model(
+        args.csv, n_workers=args.workers, threads_per_worker=args.threads_per_worker,
+        early_stopping_rounds=args.early_stopping
+    )
+    with predictor._stage('save'):
+        predictor.save_model(args.model)
+    if args.timings:
+        predictor.print_stage_timings()
     print("🎉 Training completed successfully!")
-
-